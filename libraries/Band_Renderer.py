@@ -0,0 +1,181 @@
+try:
+    import framebuf
+except ImportError:
+    framebuf = None
+
+#rows composed per band: 480 px wide RGB565 band = 19200 bytes
+BAND_ROWS = 20
+
+#dirty spans closer than this are pushed as one window
+MERGE_GAP = 16
+
+#recorded op kinds
+OP_RECT = 0
+OP_GLYPHS = 1
+OP_REGION = 2
+
+def Swap_Bytes(color):
+    return ((color & 0xFF) << 8) | (color >> 8)
+
+class Canvas(object):
+    def __init__(self, buf, w, h):
+        self.buf = buf
+        self.w = w
+        self.h = h
+        self.fb = None
+        if framebuf is not None:
+            #framebuf keeps RGB565 little endian, the panel wants big endian
+            self.fb = framebuf.FrameBuffer(buf, w, h, framebuf.RGB565)
+    def Fill_Rect(self, x, y, w, h, color):
+        if self.fb is not None:
+            self.fb.fill_rect(x, y, w, h, Swap_Bytes(color))
+            return
+        x1 = max(x, 0)
+        x2 = min(x + w, self.w)
+        if x1 >= x2:
+            return
+        pix = color.to_bytes(2, 'big') * (x2 - x1)
+        for row in range(max(y, 0), min(y + h, self.h)):
+            self.buf[(row * self.w + x1) * 2:(row * self.w + x2) * 2] = pix
+    def Blit(self, src, x, y, w, h, key = None):
+        if self.fb is not None:
+            fb = framebuf.FrameBuffer(src, w, h, framebuf.RGB565)
+            if key is None:
+                self.fb.blit(fb, x, y)
+            else:
+                self.fb.blit(fb, x, y, Swap_Bytes(key))
+            return
+        x1 = max(x, 0)
+        x2 = min(x + w, self.w)
+        if x1 >= x2:
+            return
+        buf = self.buf
+        n = 2 * (x2 - x1)
+        for row in range(max(y, 0), min(y + h, self.h)):
+            pos = ((row - y) * w + x1 - x) * 2
+            dst = (row * self.w + x1) * 2
+            if key is None:
+                buf[dst:dst + n] = src[pos:pos + n]
+                continue
+            hi = key >> 8
+            lo = key & 0xFF
+            for i in range(0, n, 2):
+                if src[pos + i] != hi or src[pos + i + 1] != lo:
+                    buf[dst + i] = src[pos + i]
+                    buf[dst + i + 1] = src[pos + i + 1]
+    def Show_Glyphs(self, lcd, x, y, string, font, color, backcolor = None):
+        chw = font['width']
+        chh = font['height']
+        key = None
+        bg = backcolor
+        if bg is None:
+            #transparent text: render on a colour the glyph can't contain and key it out
+            key = bg = color ^ 0xFFFF
+        for k in range(len(string)):
+            if x + (k + 1) * chw <= 0 or x + k * chw >= self.w:
+                continue
+            self.Blit(lcd.Glyph_Get(font, ord(string[k]) - 32, color, bg), x + k * chw, y, chw, chh, key)
+
+class Band_Renderer(object):
+    def __init__(self, lcd, rows = BAND_ROWS):
+        self.lcd = lcd
+        self.rows = rows
+        self.buf = None
+        self.items = []
+        self.ops = 0
+        self.shadow = None
+        self.frames = 0
+        self.windows = 0
+        self.pixels = 0
+        self.reads = 0
+    def Begin(self):
+        if self.lcd.batch is None:
+            self.Clear()
+        self.lcd.Begin_Batch(self)
+    def End(self):
+        self.lcd.End_Batch()
+        if self.lcd.batch is None:
+            self.frames += 1
+    def Clear(self):
+        self.items = []
+        self.ops = 0
+        #background for pixels no op covers is what the panel showed before the frame
+        self.shadow = [list(band) for band in self.lcd.shadow]
+    def Add(self, x, y, w, h, color):
+        self.ops += 1
+        self.items.append((OP_RECT, x, y, w, h, color))
+    def Add_Glyphs(self, x, y, string, font, color, backcolor = None):
+        self.ops += 1
+        self.items.append((OP_GLYPHS, x, y, font['width'] * len(string), font['height'], string, font, color, backcolor))
+    def Add_Region(self, x, y, buf, w, h):
+        #buf is kept by reference: a bytearray left unchanged until the frame is flushed
+        self.ops += 1
+        self.items.append((OP_REGION, x, y, w, h, buf))
+    def Flush(self, lcd):
+        lcd.batch_ops += self.ops
+        size = 2 * lcd.lcd_width * self.rows
+        if self.buf is None or len(self.buf) < size:
+            self.buf = bytearray(size)
+        top = lcd.lcd_height
+        bottom = 0
+        for op in self.items:
+            top = min(top, op[2])
+            bottom = max(bottom, op[2] + op[4])
+        for y in range(max(top, 0), min(bottom, lcd.lcd_height), self.rows):
+            self.Flush_Band(lcd, y, min(y + self.rows, lcd.lcd_height))
+    def Flush_Band(self, lcd, y1, y2):
+        spans = []
+        for i in range(len(self.items)):
+            op = self.items[i]
+            if op[2] >= y2 or op[2] + op[4] <= y1:
+                continue
+            a = max(op[1], 0)
+            b = min(op[1] + op[3], lcd.lcd_width)
+            if a < b:
+                spans.append((a, b, max(op[2], y1), min(op[2] + op[4], y2), i))
+        spans.sort()
+        win = None
+        for a, b, top, bottom, i in spans:
+            if win is not None and a <= win[1] + MERGE_GAP:
+                win[1] = max(win[1], b)
+                win[2] = min(win[2], top)
+                win[3] = max(win[3], bottom)
+                win[4].append(i)
+                continue
+            if win is not None:
+                self.Flush_Window(lcd, win)
+            win = [a, b, top, bottom, [i]]
+        if win is not None:
+            self.Flush_Window(lcd, win)
+    def Flush_Window(self, lcd, win):
+        x, x2, y, y2, index = win
+        w = x2 - x
+        h = y2 - y
+        index.sort()
+        ops = [self.items[i] for i in index]
+        buf = memoryview(self.buf)[:2 * w * h]
+        canvas = Canvas(buf, w, h)
+        #start from the last fill or region covering the window, else from the old content
+        base = len(ops) - 1
+        while base >= 0:
+            op = ops[base]
+            if op[0] != OP_GLYPHS and op[1] <= x and op[2] <= y and op[1] + op[3] >= x2 and op[2] + op[4] >= y2:
+                break
+            base -= 1
+        if base < 0:
+            misses = lcd.shadow_misses
+            lcd.Shadow_Region(x, y, w, h, buf, self.shadow)
+            self.reads += lcd.shadow_misses - misses
+            base = 0
+        for op in ops[base:]:
+            kind = op[0]
+            if kind == OP_RECT:
+                canvas.Fill_Rect(op[1] - x, op[2] - y, op[3], op[4], op[5])
+            elif kind == OP_REGION:
+                canvas.Blit(op[5], op[1] - x, op[2] - y, op[3], op[4])
+            else:
+                canvas.Show_Glyphs(lcd, op[1] - x, op[2] - y, op[5], op[6], op[7], op[8])
+        lcd.LCD_Write_Window(x, y, w, h, buf)
+        lcd.batch_windows += 1
+        self.windows += 1
+        self.pixels += w * h
@@ -0,0 +1,235 @@
+try:
+    import framebuf
+except ImportError:
+    framebuf = None
+from Band_Renderer import Swap_Bytes
+
+#rows expanded to RGB565 per SPI write when flushing
+FLUSH_ROWS = 16
+
+#dirty rectangles kept between flushes, the cheapest pair is merged beyond this
+DIRTY_MAX = 8
+
+def Nearest_Index(palette, color):
+    r = color >> 11
+    g = (color >> 5) & 0x3F
+    b = color & 0x1F
+    best = 0
+    dist = None
+    for i in range(len(palette)):
+        c = palette[i]
+        #red and blue are 5 bit, scale them to green's 6
+        dr = ((c >> 11) - r) * 2
+        dg = ((c >> 5) & 0x3F) - g
+        db = ((c & 0x1F) - b) * 2
+        d = dr * dr + dg * dg + db * db
+        if dist is None or d < dist:
+            best = i
+            dist = d
+    return best
+
+class Indexed_Frame(object):
+    def __init__(self, lcd, palette, rows = FLUSH_ROWS):
+        if not 0 < len(palette) <= 16:
+            raise ValueError("palette needs 1 to 16 colours")
+        self.lcd = lcd
+        self.w = lcd.lcd_width
+        self.h = lcd.lcd_height
+        self.stride = (self.w + 1) // 2
+        self.buf = bytearray(self.stride * self.h)
+        self.rows = rows
+        self.line_buf = None
+        self.palette = list(palette)
+        self.index = {}
+        for i in range(len(palette)):
+            if palette[i] not in self.index:
+                self.index[palette[i]] = i
+        #two pixels per index byte, high nibble first
+        self.lut = bytearray(1024)
+        for n in range(256):
+            for k in (0, 1):
+                c = self.palette[((n >> 4, n & 0xF)[k]) % len(palette)]
+                self.lut[n * 4 + k * 2] = c >> 8
+                self.lut[n * 4 + k * 2 + 1] = c & 0xFF
+        self.fb = None
+        if framebuf is not None:
+            self.fb = framebuf.FrameBuffer(self.buf, self.w, self.h, framebuf.GS4_HMSB)
+            self.palette_fb = framebuf.FrameBuffer(bytearray(32), 16, 1, framebuf.RGB565)
+            for i in range(len(palette)):
+                self.palette_fb.pixel(i, 0, Swap_Bytes(palette[i]))
+            self.glyph_pal = framebuf.FrameBuffer(bytearray(1), 2, 1, framebuf.GS4_HMSB)
+        self.dirty = []
+        self.ops = 0
+        self.frames = 0
+        self.windows = 0
+        self.pixels = 0
+        self.nearest = 0
+    def Begin(self):
+        self.lcd.Begin_Batch(self)
+    def End(self):
+        self.lcd.End_Batch()
+        if self.lcd.batch is None:
+            self.frames += 1
+    def Clear(self):
+        self.dirty = []
+        self.ops = 0
+    def Color_Index(self, color):
+        idx = self.index.get(color)
+        if idx is None:
+            idx = Nearest_Index(self.palette, color)
+            self.index[color] = idx
+            self.nearest += 1
+        return idx
+    def Mark(self, x1, y1, x2, y2):
+        dirty = self.dirty
+        i = 0
+        while i < len(dirty):
+            d = dirty[i]
+            if d[0] <= x2 and x1 <= d[2] and d[1] <= y2 and y1 <= d[3]:
+                x1 = min(x1, d[0])
+                y1 = min(y1, d[1])
+                x2 = max(x2, d[2])
+                y2 = max(y2, d[3])
+                dirty.pop(i)
+                i = 0
+                continue
+            i += 1
+        dirty.append([x1, y1, x2, y2])
+        if len(dirty) > DIRTY_MAX:
+            self.Merge_Dirty()
+    def Merge_Dirty(self):
+        dirty = self.dirty
+        best = None
+        for i in range(len(dirty)):
+            a = dirty[i]
+            for j in range(i + 1, len(dirty)):
+                b = dirty[j]
+                grow = (max(a[2], b[2]) - min(a[0], b[0])) * (max(a[3], b[3]) - min(a[1], b[1]))
+                grow -= (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1])
+                if best is None or grow < best[0]:
+                    best = (grow, i, j)
+        b = dirty.pop(best[2])
+        a = dirty.pop(best[1])
+        self.Mark(min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+    def Fill_Index(self, x1, y1, x2, y2, idx):
+        if self.fb is not None:
+            self.fb.fill_rect(x1, y1, x2 - x1, y2 - y1, idx)
+            return
+        buf = self.buf
+        start = x1 + (x1 & 1)
+        end = x2 & ~1
+        pair = bytes((idx * 0x11,)) * max((end - start) // 2, 0)
+        for row in range(y1, y2):
+            base = row * self.stride
+            if x1 & 1:
+                buf[base + x1 // 2] = (buf[base + x1 // 2] & 0xF0) | idx
+            if end > start:
+                buf[base + start // 2:base + end // 2] = pair
+            if x2 & 1 and x2 - 1 >= start:
+                buf[base + x2 // 2] = (buf[base + x2 // 2] & 0x0F) | (idx << 4)
+    def Set_Index(self, x, y, idx):
+        pos = y * self.stride + x // 2
+        if x & 1:
+            self.buf[pos] = (self.buf[pos] & 0xF0) | idx
+        else:
+            self.buf[pos] = (self.buf[pos] & 0x0F) | (idx << 4)
+    def Add(self, x, y, w, h, color):
+        x1 = max(x, 0)
+        y1 = max(y, 0)
+        x2 = min(x + w, self.w)
+        y2 = min(y + h, self.h)
+        if x1 >= x2 or y1 >= y2:
+            return
+        self.ops += 1
+        self.Fill_Index(x1, y1, x2, y2, self.Color_Index(color))
+        self.Mark(x1, y1, x2, y2)
+    def Add_Clear(self, color):
+        self.ops += 1
+        self.Fill_Index(0, 0, self.w, self.h, self.Color_Index(color))
+        self.Mark(0, 0, self.w, self.h)
+    def Add_Glyphs(self, x, y, string, font, color, backcolor = None):
+        chw = font['width']
+        chh = font['height']
+        w = chw * len(string)
+        if x >= self.w or y >= self.h or x + w <= 0 or y + chh <= 0:
+            return
+        self.ops += 1
+        fg = self.Color_Index(color)
+        if backcolor is not None:
+            bg = self.Color_Index(backcolor)
+            self.Fill_Index(max(x, 0), max(y, 0), min(x + w, self.w), min(y + chh, self.h), bg)
+        bytes_line = (chw + 7) // 8
+        size = bytes_line * chh
+        data = memoryview(font['data'])
+        if self.fb is not None:
+            #glyph bits are MONO_HLSB already, 1 maps to fg and 0 to a key index;
+            #blit compares the key after the palette, so it must differ from fg
+            key = 1 if fg == 0 else 0
+            self.glyph_pal.pixel(0, 0, key)
+            self.glyph_pal.pixel(1, 0, fg)
+        for k in range(len(string)):
+            gx = x + k * chw
+            if gx >= self.w or gx + chw <= 0:
+                continue
+            offset = size * (ord(string[k]) - 32)
+            if self.fb is not None:
+                glyph = framebuf.FrameBuffer(data[offset:offset + size], chw, chh, framebuf.MONO_HLSB)
+                self.fb.blit(glyph, gx, y, key, self.glyph_pal)
+                continue
+            for i in range(chh):
+                if not 0 <= y + i < self.h:
+                    continue
+                for j in range(chw):
+                    if data[offset + i * bytes_line + j // 8] & (0x80 >> (j & 7)) and 0 <= gx + j < self.w:
+                        self.Set_Index(gx + j, y + i, fg)
+        self.Mark(max(x, 0), max(y, 0), min(x + w, self.w), min(y + chh, self.h))
+    def Add_Region(self, x, y, buf, w, h):
+        #RGB565 pixels are mapped to the nearest palette entry one by one
+        x1 = max(x, 0)
+        y1 = max(y, 0)
+        x2 = min(x + w, self.w)
+        y2 = min(y + h, self.h)
+        if x1 >= x2 or y1 >= y2:
+            return
+        self.ops += 1
+        for row in range(y1, y2):
+            pos = ((row - y) * w + x1 - x) * 2
+            for col in range(x1, x2):
+                self.Set_Index(col, row, self.Color_Index((buf[pos] << 8) | buf[pos + 1]))
+                pos += 2
+        self.Mark(x1, y1, x2, y2)
+    def Flush(self, lcd):
+        lcd.batch_ops += self.ops
+        for x1, y1, x2, y2 in self.dirty:
+            #whole index bytes only, so the soft path can expand two pixels at a time
+            x1 &= ~1
+            x2 = min(x2 + (x2 & 1), self.w)
+            self.Flush_Rect(lcd, x1, y1, x2 - x1, y2 - y1)
+    def Flush_Rect(self, lcd, x, y, w, h):
+        size = 2 * w * self.rows
+        if self.line_buf is None or len(self.line_buf) < size:
+            self.line_buf = bytearray(size)
+        mv = memoryview(self.line_buf)
+        lut = memoryview(self.lut)
+        lcd.LCD_Set_Windows(x, y, x + w - 1, y + h - 1)
+        lcd.lcd_cs(0)
+        lcd.spi_txns += 1
+        lcd.lcd_rs(1)
+        for top in range(y, y + h, self.rows):
+            n = min(self.rows, y + h - top)
+            out = mv[:2 * w * n]
+            if self.fb is not None:
+                chunk = framebuf.FrameBuffer(out, w, n, framebuf.RGB565)
+                chunk.blit(self.fb, -x, -top, -1, self.palette_fb)
+            else:
+                pos = 0
+                for row in range(top, top + n):
+                    base = row * self.stride + x // 2
+                    for b in self.buf[base:base + w // 2]:
+                        out[pos:pos + 4] = lut[b * 4:b * 4 + 4]
+                        pos += 4
+            lcd.spi.write(out)
+        lcd.lcd_cs(1)
+        lcd.batch_windows += 1
+        self.windows += 1
+        self.pixels += w * h
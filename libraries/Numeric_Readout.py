@@ -0,0 +1,85 @@
+from Band_Renderer import Canvas
+
+class Numeric_Readout(object):
+    def __init__(self, lcd, x, y, prefix, digits, suffix, font):
+        self.lcd = lcd
+        self.x = x
+        self.y = y
+        self.prefix = prefix
+        self.digits = digits
+        self.suffix = suffix
+        self.font = font
+        self.backcolor = None
+        self.backdrop = None
+        self.text = None
+        self.color = None
+        self.cells = None
+        self.full_draws = 0
+        self.cell_draws = 0
+    def Reset(self, backcolor = None, backdrop = None):
+        #the area under the readout was just repainted; without a backcolor the
+        #digits are transparent and backdrop(x, y, w, h) returns what lies under them
+        self.backcolor = backcolor
+        self.backdrop = backdrop
+        self.text = None
+        self.color = None
+        self.cells = None
+    def Format(self, value):
+        #zero padded to digits with the sign in the first cell; a value that
+        #doesn't fit comes out longer rather than clamped
+        value = int(value)
+        text = str(abs(value))
+        if value < 0:
+            return '-' + '0' * (self.digits - 1 - len(text)) + text
+        return '0' * (self.digits - len(text)) + text
+    def Draw(self, value, color):
+        text = self.Format(value)
+        chw = self.font['width']
+        chh = self.font['height']
+        #cells are only repainted one by one while the width holds
+        if self.text is None or color != self.color or len(text) != self.digits or len(self.text) != self.digits:
+            if self.text is not None:
+                w = chw * (len(self.prefix) + len(self.text) + len(self.suffix))
+                if self.backcolor is None:
+                    self.lcd.Fill_Region(self.x, self.y, self.backdrop(self.x, self.y, w, chh), w, chh)
+                else:
+                    #clear what a longer value left past the new one
+                    used = chw * (len(self.prefix) + len(text) + len(self.suffix))
+                    if w > used:
+                        self.lcd.Fill_Rect(self.x + used, self.y, w - used, chh, self.backcolor)
+            self.lcd.Show_String(self.x, self.y, self.prefix + text + self.suffix, self.font, color, self.backcolor)
+            self.text = text
+            self.color = color
+            self.full_draws += 1
+            return True
+        x = self.x + chw * len(self.prefix)
+        for i in range(self.digits):
+            if text[i] != self.text[i]:
+                self.Draw_Cell(i, x + i * chw, text[i], color)
+        self.text = text
+        return False
+    def Draw_Cell(self, i, x, char, color):
+        chw = self.font['width']
+        chh = self.font['height']
+        self.cell_draws += 1
+        if self.backcolor is not None:
+            self.lcd.Fill_Region(x, self.y, self.lcd.Glyph_Get(self.font, ord(char) - 32, color, self.backcolor), chw, chh)
+            return
+        if self.cells is None:
+            self.Split_Backdrop()
+        bg, buf = self.cells[i]
+        buf[:] = bg
+        Canvas(buf, chw, chh).Show_Glyphs(self.lcd, 0, 0, char, self.font, color)
+        self.lcd.Fill_Region(x, self.y, buf, chw, chh)
+    def Split_Backdrop(self):
+        chw = self.font['width']
+        chh = self.font['height']
+        row = 2 * chw
+        stride = row * self.digits
+        box = self.backdrop(self.x + chw * len(self.prefix), self.y, chw * self.digits, chh)
+        self.cells = []
+        for i in range(self.digits):
+            bg = bytearray(row * chh)
+            for r in range(chh):
+                bg[r * row:(r + 1) * row] = box[r * stride + i * row:r * stride + (i + 1) * row]
+            self.cells.append((bg, bytearray(len(bg))))
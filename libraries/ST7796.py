@@ -1,6 +1,7 @@
 from machine import Pin
 import ustruct
 import time
+from array import array
 
 XCMD = 0x2A
 YCMD = 0x2B
@@ -8,6 +9,10 @@ WCMD = 0x2C
 RCMD = 0x2E
 MADCTL = 0x36
 
+XCMD_BUF = bytes([XCMD])
+YCMD_BUF = bytes([YCMD])
+WCMD_BUF = bytes([WCMD])
+
 LCD_W = 320
 LCD_H = 480
 
@@ -17,11 +22,134 @@ SPI_R_SPEED = 10000000
 #mem size
 MEM_SIZE = 5120  #5x1024
 
+#reusable solid colour buffers: short per-colour lines plus one MEM_SIZE buffer
+FILL_LINE_PX = 64
+FILL_POOL_SIZE = 16
+
+#shadow of solid fills, used as the background for transparent text
+SHADOW_BAND = 32        #rows per band, each band keeps its own rect list
+SHADOW_MAX = 48         #rects remembered per band, oldest dropped first
+SHADOW_PRUNE_AREA = 64  #fills at least this big drop the rects they cover
+
+#rendered glyph bitmaps kept for reuse, least recently used dropped first
+GLYPH_CACHE_BYTES = 8192
+
+#translation-free op tables for circles and ellipses, least recently used dropped first
+SHAPE_CACHE_BYTES = 6144
+
+#pixels set in each 4-bit slice of a glyph row, leftmost pixel first
+NIBBLE_BITS = tuple(tuple(j for j in range(4) if n & (0x8 >> j)) for n in range(16))
+
 DEFAULT_ROTATE = 0  # 0-0, 1-90, 2-180, 3-270
 
 def Delay_Ms(time_ms):
     time.sleep_ms(time_ms)
-   
+
+class Shape_Recorder(object):
+    def __init__(self):
+        self.ops = array('h')
+    def Draw_Point(self, x, y, color):
+        self.ops.extend((x, y, 1, 1))
+    def Draw_Hline(self, x, y, w, color):
+        if w > 0:
+            self.ops.extend((x, y, w, 1))
+    def Draw_Vline(self, x, y, h, color):
+        if h > 0:
+            self.ops.extend((x, y, 1, h))
+
+class Display_List(object):
+    def __init__(self):
+        self.rows = {}
+        self.ops = 0
+    def Clear(self):
+        self.rows = {}
+        self.ops = 0
+    def Add(self, x, y, w, h, color):
+        self.ops += 1
+        for row in range(y, y + h):
+            self.Paint(row, x, x + w, color)
+    def Paint(self, row, x1, x2, color):
+        spans = self.rows.get(row)
+        if spans is None:
+            self.rows[row] = [[x1, x2, color]]
+            return
+        out = []
+        new = [x1, x2, color]
+        for span in spans:
+            a, b, c = span
+            if b <= x1 or a >= x2:
+                if a >= x2 and new is not None:
+                    self.Span_Append(out, new)
+                    new = None
+                self.Span_Append(out, span)
+                continue
+            if a < x1:
+                self.Span_Append(out, [a, x1, c])
+            if new is not None:
+                self.Span_Append(out, new)
+                new = None
+            if b > x2:
+                self.Span_Append(out, [x2, b, c])
+        if new is not None:
+            self.Span_Append(out, new)
+        self.rows[row] = out
+    def Span_Append(self, out, span):
+        if out:
+            last = out[-1]
+            if last[1] == span[0] and last[2] == span[2]:
+                last[1] = span[1]
+                return
+        out.append(span)
+    def Windows(self):
+        windows = []
+        live = {}
+        for row in sorted(self.rows):
+            segs = []
+            for span in self.rows[row]:
+                if segs and segs[-1][-1][1] == span[0]:
+                    segs[-1].append(span)
+                else:
+                    segs.append([span])
+            grown = {}
+            for seg in segs:
+                key = (seg[0][0], seg[-1][1])
+                win = live.pop(key, None)
+                if win is not None and win[0] + win[3] == row:
+                    win[3] += 1
+                    win[4].append(seg)
+                else:
+                    if win is not None:
+                        windows.append(win)
+                    win = [row, key[0], key[1] - key[0], 1, [seg]]
+                grown[key] = win
+            windows.extend(live.values())
+            live = grown
+        windows.extend(live.values())
+        windows.sort()
+        return windows
+    def Flush(self, lcd):
+        lcd.batch_ops += self.ops
+        for y, x, w, h, rows in self.Windows():
+            lcd.batch_windows += 1
+            color = rows[0][0][2]
+            for seg in rows:
+                if len(seg) > 1 or seg[0][2] != color:
+                    color = None
+                    break
+            if color is not None:
+                lcd.Fill_Window(x, y, w, h, color)
+                continue
+            size = 2 * w * h
+            if len(lcd.batch_buf) < size:
+                lcd.batch_buf = bytearray(size)
+            buf = memoryview(lcd.batch_buf)
+            pos = 0
+            for seg in rows:
+                for a, b, c in seg:
+                    lcd.Buf_Fill(buf[pos:pos + 2 * (b - a)], c)
+                    pos += 2 * (b - a)
+            lcd.LCD_Write_Window(x, y, w, h, buf[:size])
+
 class LCD_35_ST7796(object):
     def __init__(self, spi, cs, rs, blk, rst = None, width = LCD_W, height = LCD_H):
         self.spi = spi
@@ -29,6 +157,39 @@ class LCD_35_ST7796(object):
         self.lcd_height = height
         self.lcd_id = 0
         self.lcd_rotate = 0
+        self.shadow = []
+        self.shadow_hits = 0
+        self.shadow_misses = 0
+        self.spi_txns = 0
+        self.last_string_txns = 0
+        self.text_buf = bytearray(0)
+        self.fill_pool = {}
+        self.fill_tick = 0
+        self.fill_buf = None
+        self.fill_color = None
+        self.fill_allocs = 0
+        self.fill_refills = 0
+        self.win_arg = bytearray(4)
+        self.win_skips = 0
+        self.batch = None
+        self.batch_depth = 0
+        self.batch_ops = 0
+        self.batch_windows = 0
+        self.batch_buf = bytearray(0)
+        self.shape_cache = {}
+        self.shape_bytes = 0
+        self.shape_tick = 0
+        self.shape_hits = 0
+        self.shape_misses = 0
+        self.LCD_Window_Reset()
+        self.glyph_budget = GLYPH_CACHE_BYTES
+        self.glyph_cache = {}
+        self.glyph_bytes = 0
+        self.glyph_tick = 0
+        self.glyph_hits = 0
+        self.glyph_misses = 0
+        self.glyph_lut = bytearray(16 * 8)
+        self.glyph_lut_key = None
         self.lcd_cs = Pin(cs, Pin.OUT)
         self.lcd_rs = Pin(rs, Pin.OUT)
         self.lcd_blk = Pin(blk, Pin.OUT)
@@ -50,6 +211,7 @@ class LCD_35_ST7796(object):
         Delay_Ms(50)
     def LCD_Write_Reg(self, cmd, data = None):
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(0)
         self.spi.write(bytearray([cmd]))
         if data is not None:
@@ -58,11 +220,13 @@ class LCD_35_ST7796(object):
         self.lcd_cs(1)
     def LCD_Write_Data(self, data):
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(1)
         self.spi.write(data)
         self.lcd_cs(1)
     def LCD_Read_Color(self):
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(0)
         self.spi.write(bytearray([RCMD]))
         self.lcd_rs(1)
@@ -72,6 +236,7 @@ class LCD_35_ST7796(object):
         rdata |= buf[2]
         return rdata
     def LCD_Init(self):
+        self.LCD_Window_Reset()
         self.LCD_Write_Reg(0x11)
         Delay_Ms(120)      
         self.LCD_Write_Reg(0x36, b"\x48") 
@@ -91,22 +256,50 @@ class LCD_35_ST7796(object):
         self.LCD_Write_Reg(0xF0, b"\x69")        
         Delay_Ms(120)
         self.LCD_Write_Reg(0X29)                
+    def LCD_Window_Reset(self):
+        self.win_cols = None
+        self.win_rows = None
     def LCD_Set_Windows(self,x1,y1,x2,y2):
-        self.LCD_Write_Reg(XCMD, ustruct.pack(">HH", x1, x2))
-        self.LCD_Write_Reg(YCMD, ustruct.pack(">HH", y1, y2))
-        self.LCD_Write_Reg(WCMD)
+        if self.batch is not None and self.batch.ops:
+            self.Flush_Batch()
+        arg = self.win_arg
+        self.lcd_cs(0)
+        self.spi_txns += 1
+        cols = (x1 << 16) | x2
+        if cols != self.win_cols:
+            self.lcd_rs(0)
+            self.spi.write(XCMD_BUF)
+            self.lcd_rs(1)
+            ustruct.pack_into(">HH", arg, 0, x1, x2)
+            self.spi.write(arg)
+            self.win_cols = cols
+        else:
+            self.win_skips += 1
+        rows = (y1 << 16) | y2
+        if rows != self.win_rows:
+            self.lcd_rs(0)
+            self.spi.write(YCMD_BUF)
+            self.lcd_rs(1)
+            ustruct.pack_into(">HH", arg, 0, y1, y2)
+            self.spi.write(arg)
+            self.win_rows = rows
+        else:
+            self.win_skips += 1
+        self.lcd_rs(0)
+        self.spi.write(WCMD_BUF)
+        self.lcd_cs(1)
     def LCD_Clear(self, color): 
+        self.Shadow_Reset(color)
+        if self.batch is not None:
+            self.batch.Clear()
+            if hasattr(self.batch, 'Add_Clear'):
+                self.batch.Add_Clear(color)
+                return
         self.LCD_Set_Windows(0,0,self.lcd_width-1,self.lcd_height-1)
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(1)
-        quo, rest = divmod(self.lcd_width*self.lcd_height,MEM_SIZE)
-        if quo:
-            buf = ustruct.pack(">H",color)*MEM_SIZE
-            for i in range(quo):
-                self.spi.write(buf)
-        if rest:
-            buf = ustruct.pack(">H",color)*rest
-            self.spi.write(buf)
+        self.Write_Color(self.lcd_width * self.lcd_height, color)
         self.lcd_cs(1)
     def LCD_Read_ID(self):
         val = bytearray(b'\x00\x00\x00')
@@ -114,6 +307,7 @@ class LCD_35_ST7796(object):
         self.LCD_Write_Reg(0xF0, b"\xC3")
         self.LCD_Write_Reg(0xF0, b"\x96")
         self.lcd_cs(0)
+        self.spi_txns += 1
         for i in range(1,4):
             self.lcd_rs(0)
             self.spi.write(bytearray([0xFB]))
@@ -152,6 +346,8 @@ class LCD_35_ST7796(object):
         self.lcd_height = LCD_W
         self.LCD_Write_Reg(MADCTL, b"\xE8")
     def LCD_Set_Rotate(self, ro):
+        if self.batch is not None:
+            self.Flush_Batch()
         self.lcd_rotate = ro % 4
         rotate = {
             0: self.Rotate_0_deg,
@@ -161,20 +357,117 @@ class LCD_35_ST7796(object):
         }
         #set_rotate = rotate.get(self.lcd_rotate, lambda: self.Rotate_0_deg)
         rotate[self.lcd_rotate]()
+        self.LCD_Window_Reset()
+        self.Shadow_Reset()
     def Draw_Point(self, x, y, color):
-        self.LCD_Set_Windows(x,y,x,y)
-        self.LCD_Write_Data(ustruct.pack(">H",color))
+        self.Shadow_Add(x, y, 1, 1, color)
+        self.Fill_Window(x, y, 1, 1, color)
     def Read_Point(self, x, y):
         self.spi.init(baudrate=SPI_R_SPEED)
         self.LCD_Set_Windows(x,y,x,y)
         color = self.LCD_Read_Color()
         self.spi.init(baudrate=SPI_W_SPEED)
         return color
-    def Read_Region(self, x, y, w, h):
-        buf = bytearray(2 * w * h)
+    def Shadow_Reset(self, color = None):
+        self.shadow = [[] for i in range((self.lcd_height + SHADOW_BAND - 1) // SHADOW_BAND)]
+        if color is not None:
+            self.Shadow_Add(0, 0, self.lcd_width, self.lcd_height, color)
+    def Shadow_Add(self, x, y, w, h, color):
+        y2 = y + h
+        band = max(y, 0) // SHADOW_BAND
+        while band < len(self.shadow) and band * SHADOW_BAND < y2:
+            top = max(y, band * SHADOW_BAND)
+            bottom = min(y2, (band + 1) * SHADOW_BAND)
+            self.Shadow_Band_Add(self.shadow[band], x, top, w, bottom - top, color)
+            band += 1
+    def Shadow_Band_Add(self, shadow, x, y, w, h, color):
+        if color is None:
+            if shadow:
+                last = shadow[-1]
+                if last[4] is None and last[1] == y and last[3] == h and last[0] + last[2] == x:
+                    shadow[-1] = (last[0], y, last[2] + w, h, None)
+                    return
+        elif w * h >= SHADOW_PRUNE_AREA:
+            x2 = x + w
+            y2 = y + h
+            shadow[:] = [r for r in shadow if r[0] < x or r[1] < y or r[0] + r[2] > x2 or r[1] + r[3] > y2]
+        shadow.append((x, y, w, h, color))
+        if len(shadow) > SHADOW_MAX:
+            del shadow[0]
+    def Shadow_Region(self, x, y, w, h, buf = None, shadow = None):
+        if buf is None:
+            buf = bytearray(2 * w * h)
+        if shadow is None:
+            shadow = self.shadow
+        y2 = y + h
+        top = y
+        band = y // SHADOW_BAND
+        while top < y2:
+            bottom = min(y2, (band + 1) * SHADOW_BAND)
+            if top < 0 or band >= len(shadow) or not self.Shadow_Band_Fill(shadow[band], buf, x, y, w, top, bottom):
+                self.shadow_misses += 1
+                return self.Read_Region(x, y, w, h, buf)
+            top = bottom
+            band += 1
+        self.shadow_hits += 1
+        return buf
+    def Shadow_Band_Fill(self, shadow, buf, x, y, w, top, bottom):
+        x2 = x + w
+        i = len(shadow) - 1
+        while i >= 0:
+            rx, ry, rw, rh, color = shadow[i]
+            if rx < x2 and ry < bottom and rx + rw > x and ry + rh > top:
+                if color is None:
+                    return False
+                if rx <= x and ry <= top and rx + rw >= x2 and ry + rh >= bottom:
+                    break
+            i -= 1
+        if i < 0:
+            return False
+        for j in range(i, len(shadow)):
+            rx, ry, rw, rh, color = shadow[j]
+            cx1 = max(rx, x) - x
+            cx2 = min(rx + rw, x2) - x
+            if cx1 >= cx2 or ry >= bottom or ry + rh <= top:
+                continue
+            pix = color.to_bytes(2, 'big') * (cx2 - cx1)
+            for row in range(max(ry, top) - y, min(ry + rh, bottom) - y):
+                buf[(row * w + cx1) * 2:(row * w + cx2) * 2] = pix
+        return True
+    def Shadow_Solid(self, x, y, w, h):
+        color = None
+        y2 = y + h
+        top = y
+        band = y // SHADOW_BAND
+        while top < y2:
+            if top < 0 or band >= len(self.shadow):
+                return None
+            bottom = min(y2, (band + 1) * SHADOW_BAND)
+            c = self.Shadow_Band_Solid(self.shadow[band], x, x + w, top, bottom)
+            if c is None or (color is not None and c != color):
+                return None
+            color = c
+            top = bottom
+            band += 1
+        self.shadow_hits += 1
+        return color
+    def Shadow_Band_Solid(self, shadow, x, x2, top, bottom):
+        i = len(shadow) - 1
+        while i >= 0:
+            rx, ry, rw, rh, color = shadow[i]
+            if rx < x2 and ry < bottom and rx + rw > x and ry + rh > top:
+                if rx <= x and ry <= top and rx + rw >= x2 and ry + rh >= bottom:
+                    return color
+                return None
+            i -= 1
+        return None
+    def Read_Region(self, x, y, w, h, buf = None):
+        if buf is None:
+            buf = bytearray(2 * w * h)
         self.spi.init(baudrate=SPI_R_SPEED)
         self.LCD_Set_Windows(x, y, x + w - 1, y + h - 1)
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(0)
         self.spi.write(bytearray([RCMD]))
         self.lcd_rs(1)
@@ -183,9 +476,69 @@ class LCD_35_ST7796(object):
         self.lcd_cs(1)
         self.spi.init(baudrate=SPI_W_SPEED)
         return buf
+    def Buf_Fill(self, buf, color):
+        size = len(buf)
+        buf[0] = color >> 8
+        buf[1] = color & 0xFF
+        n = 2
+        while n < size:
+            m = min(n, size - n)
+            buf[n:n + m] = buf[0:m]
+            n += m
+    def Fill_Line(self, color):
+        pool = self.fill_pool
+        self.fill_tick += 1
+        entry = pool.get(color)
+        if entry is None:
+            if len(pool) < FILL_POOL_SIZE:
+                buf = bytearray(2 * FILL_LINE_PX)
+                self.fill_allocs += 1
+            else:
+                oldest = None
+                for c in pool:
+                    if oldest is None or pool[c][1] < pool[oldest][1]:
+                        oldest = c
+                buf = pool.pop(oldest)[0]
+                self.fill_refills += 1
+            self.Buf_Fill(buf, color)
+            entry = [buf, 0]
+            pool[color] = entry
+        entry[1] = self.fill_tick
+        return entry[0]
+    def Fill_Big(self, color):
+        if self.fill_buf is None:
+            self.fill_buf = bytearray(2 * MEM_SIZE)
+            self.fill_allocs += 1
+            self.fill_color = None
+        if self.fill_color != color:
+            self.Buf_Fill(self.fill_buf, color)
+            self.fill_color = color
+            self.fill_refills += 1
+        return self.fill_buf
+    def Write_Color(self, count, color):
+        if count <= 0:
+            return
+        if count > 8 * FILL_LINE_PX or (count > FILL_LINE_PX and color == self.fill_color):
+            buf = self.Fill_Big(color)
+        else:
+            buf = self.Fill_Line(color)
+        size = len(buf) // 2
+        if count >= size:
+            for i in range(count // size):
+                self.spi.write(buf)
+            count %= size
+        if count:
+            self.spi.write(memoryview(buf)[:2 * count])
     def Fill_Region(self, x, y, buf, w, h):
+        self.Shadow_Add(x, y, w, h, None)
+        if self.batch is not None and hasattr(self.batch, 'Add_Region'):
+            self.batch.Add_Region(x, y, buf, w, h)
+            return
+        self.LCD_Write_Window(x, y, w, h, buf)
+    def LCD_Write_Window(self, x, y, w, h, buf):
         self.LCD_Set_Windows(x, y, x + w - 1, y + h - 1)
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(1)
         self.spi.write(buf)
         self.lcd_cs(1)
@@ -198,44 +551,44 @@ class LCD_35_ST7796(object):
             w = self.lcd_width - x
         if (y + h) > self.lcd_height:
             h = self.lcd_height - y
-        self.LCD_Set_Windows(x, y, x + w - 1, y + h - 1)
-        self.lcd_cs(0)
-        self.lcd_rs(1)
-        quo, rest = divmod(w * h, MEM_SIZE)
-        if quo:
-            buf = ustruct.pack(">H", color) * MEM_SIZE
-            for i in range(quo):
-                self.spi.write(buf)
-        if rest != 0:
-            rbuf = ustruct.pack(">H", color) * rest
-            self.spi.write(rbuf)
-        self.lcd_cs(1)
+        self.Shadow_Add(x, y, w, h, color)
+        self.Fill_Window(x, y, w, h, color)
     def Draw_Hline(self, x, y, w, color):
-        self.LCD_Set_Windows(x, y, x + w - 1, y)
-        self.lcd_cs(0)
-        self.lcd_rs(1)
-        quo, rest = divmod(w, 10)
-        if quo:
-            buf = ustruct.pack(">H", color) * 10
-            for i in range(quo):
-                self.spi.write(buf)
-        if rest != 0:
-            rbuf = ustruct.pack(">H", color) * rest
-            self.spi.write(rbuf)
-        self.lcd_cs(1)
+        self.Shadow_Add(x, y, w, 1, color)
+        self.Fill_Window(x, y, w, 1, color)
     def Draw_Vline(self, x, y, h, color):
-        self.LCD_Set_Windows(x, y, x, y + h - 1)
+        self.Shadow_Add(x, y, 1, h, color)
+        self.Fill_Window(x, y, 1, h, color)
+    def Fill_Window(self, x, y, w, h, color):
+        if self.batch is not None:
+            if w > 0 and h > 0:
+                self.batch.Add(x, y, w, h, color)
+            return
+        self.LCD_Set_Windows(x, y, x + w - 1, y + h - 1)
         self.lcd_cs(0)
+        self.spi_txns += 1
         self.lcd_rs(1)
-        quo, rest = divmod(h, 10)
-        if quo:
-            buf = ustruct.pack(">H", color) * 10
-            for i in range(quo):
-                self.spi.write(buf)
-        if rest != 0:
-            rbuf = ustruct.pack(">H", color) * rest
-            self.spi.write(rbuf)
+        self.Write_Color(w * h, color)
         self.lcd_cs(1)
+    def Begin_Batch(self, batch = None):
+        if self.batch is not None:
+            self.batch_depth += 1
+            return
+        self.batch = batch if batch is not None else Display_List()
+    def End_Batch(self):
+        if self.batch_depth:
+            self.batch_depth -= 1
+            return
+        self.Flush_Batch()
+        self.batch = None
+    def Flush_Batch(self):
+        batch = self.batch
+        if batch is None or not batch.ops:
+            return
+        self.batch = None
+        batch.Flush(self)
+        batch.Clear()
+        self.batch = batch
     def Draw_line(self, x1, y1, x2, y2, color):
         ste = abs(y2 - y1) > abs(x2 - x1)
         if ste:
@@ -432,6 +785,8 @@ class LCD_35_ST7796(object):
             self.Draw_Hline(a, i, b - a + 1, color)
             i += 1
     def Draw_Circle(self, x, y, r, color):
+        self.Draw_Ops(self.Shape_Ops(LCD_35_ST7796.Trace_Circle, r), x, y, color)
+    def Trace_Circle(self, x, y, r, color):
         f = 1 - r
         dfy = -2 * r
         dfx = 1
@@ -480,6 +835,8 @@ class LCD_35_ST7796(object):
             if xe >= r:
                 break
     def Fill_Circle(self, x, y, r, color):
+        self.Draw_Ops(self.Shape_Ops(LCD_35_ST7796.Trace_Fill_Circle, r), x, y, color)
+    def Trace_Fill_Circle(self, x, y, r, color):
         bx = 0
         dx = 1
         dy = 2*r
@@ -498,6 +855,8 @@ class LCD_35_ST7796(object):
             self.Draw_Hline(x - r, y + bx, dy + 1, color)
             self.Draw_Hline(x - r, y - bx, dy + 1, color)            
     def Draw_Ellipse(self, x, y, xr, yr, color):
+        self.Draw_Ops(self.Shape_Ops(LCD_35_ST7796.Trace_Ellipse, xr, yr), x, y, color)
+    def Trace_Ellipse(self, x, y, xr, yr, color):
         if xr < 2:
             return
         if yr < 2:
@@ -533,6 +892,8 @@ class LCD_35_ST7796(object):
             s += xr1 * (4 * by + 6)
             by += 1        
     def Fill_Ellipse(self, x, y, xr, yr, color):
+        self.Draw_Ops(self.Shape_Ops(LCD_35_ST7796.Trace_Fill_Ellipse, xr, yr), x, y, color)
+    def Trace_Fill_Ellipse(self, x, y, xr, yr, color):
         if xr < 2:
             return
         if yr < 2:
@@ -563,6 +924,38 @@ class LCD_35_ST7796(object):
                 bx -= 1
             s += xr1 * (4 * by + 6)
             by += 1
+    def Shape_Ops(self, trace, *args):
+        key = (trace,) + args
+        entry = self.shape_cache.get(key)
+        self.shape_tick += 1
+        if entry is not None:
+            entry[1] = self.shape_tick
+            self.shape_hits += 1
+            return entry[0]
+        self.shape_misses += 1
+        rec = Shape_Recorder()
+        trace(rec, 0, 0, *args, 0)
+        ops = rec.ops
+        size = 2 * len(ops)
+        if size <= SHAPE_CACHE_BYTES:
+            self.shape_cache[key] = [ops, self.shape_tick]
+            self.shape_bytes += size
+            while self.shape_bytes > SHAPE_CACHE_BYTES:
+                cache = self.shape_cache
+                oldest = None
+                for k in cache:
+                    if oldest is None or cache[k][1] < cache[oldest][1]:
+                        oldest = k
+                self.shape_bytes -= 2 * len(cache.pop(oldest)[0])
+        return ops
+    def Draw_Ops(self, ops, x, y, color):
+        for i in range(0, len(ops), 4):
+            ox = x + ops[i]
+            oy = y + ops[i + 1]
+            w = ops[i + 2]
+            h = ops[i + 3]
+            self.Shadow_Add(ox, oy, w, h, color)
+            self.Fill_Window(ox, oy, w, h, color)
     def Show_BMP_Pic(self, picpath, x, y):
         with open(picpath, 'rb') as file:
             if file.read(2) == b'BM':
@@ -581,6 +974,7 @@ class LCD_35_ST7796(object):
                             flip = False
                         else:
                             flip = True
+                        self.Shadow_Add(x, y, width, height, None)
                         self.LCD_Set_Windows(x, y, x + width - 1, y + height - 1)
                         for row in range(height):
                             if flip:
@@ -595,6 +989,7 @@ class LCD_35_ST7796(object):
                                 rbuf[col * 2] = buf[0]
                                 rbuf[col * 2 + 1] = buf[1]
                             self.lcd_cs(0)
+                            self.spi_txns += 1
                             self.lcd_rs(1)
                             self.spi.write(rbuf)
                             self.lcd_cs(1)
@@ -603,32 +998,66 @@ class LCD_35_ST7796(object):
             return
         if font.get('start') == None:
             return
-        chw = font['width']
-        chh = font['height']
         num = ord(char) - 32
         if num < font['start'] or num > font['end']:
             return
-        bytes_line , res = divmod(chw, 8)
-        if res != 0:
-            bytes_line += 1
-        bytes_char = bytes_line * chh
-        char_data = font["data"][bytes_char * num:bytes_char * (num + 1)]
-        if backcolor is not None:
-            color_buf = bytearray(backcolor.to_bytes(2, 'big') * chw * chh)
-        else:
-            color_buf = self.Read_Region(x, y, chw, chh)
+        self.Show_Glyphs(x, y, char, font, color, backcolor)
+    def Glyph_Lut(self, color, backcolor):
+        key = (color << 16) | backcolor
+        lut = self.glyph_lut
+        if key != self.glyph_lut_key:
+            for n in range(16):
+                for j in range(4):
+                    c = color if n & (0x8 >> j) else backcolor
+                    lut[n * 8 + j * 2] = c >> 8
+                    lut[n * 8 + j * 2 + 1] = c & 0xFF
+            self.glyph_lut_key = key
+        return lut
+    def Glyph_Get(self, font, num, color, backcolor):
+        data = font["data"]
+        key = (id(data), num, color, backcolor)
+        entry = self.glyph_cache.get(key)
+        self.glyph_tick += 1
+        if entry is not None:
+            entry[1] = self.glyph_tick
+            self.glyph_hits += 1
+            return entry[0]
+        self.glyph_misses += 1
+        chw = font['width']
+        chh = font['height']
+        bytes_line = (chw + 7) // 8
+        offset = bytes_line * chh * num
+        lut = memoryview(self.Glyph_Lut(color, backcolor))
+        glyph = bytearray(2 * chw * chh)
+        pos = 0
         for i in range(chh):
-            pdata = int.from_bytes(char_data[i * bytes_line:(i + 1) * bytes_line], 'big')
-            for j in range(chw):
-                if pdata & (0x1 << (8 * bytes_line -1)):
-                    color_buf[(i * chw + j) * 2] = color >> 8
-                    color_buf[(i * chw + j) * 2 + 1] = color & 0xFF
-                pdata <<= 1
-        self.LCD_Set_Windows(x, y, x + chw - 1, y + chh - 1)
-        self.lcd_cs(0)
-        self.lcd_rs(1)
-        self.spi.write(color_buf)
-        self.lcd_cs(1)
+            col = 0
+            for b in range(bytes_line):
+                byte = data[offset + i * bytes_line + b]
+                for n in (byte >> 4, byte & 0xF):
+                    px = min(4, chw - col)
+                    if px <= 0:
+                        break
+                    glyph[pos:pos + 2 * px] = lut[n * 8:n * 8 + 2 * px]
+                    pos += 2 * px
+                    col += px
+        size = len(glyph)
+        if size <= self.glyph_budget:
+            self.glyph_cache[key] = [glyph, self.glyph_tick]
+            self.glyph_bytes += size
+            while self.glyph_bytes > self.glyph_budget:
+                self.Glyph_Evict()
+        return glyph
+    def Glyph_Evict(self):
+        cache = self.glyph_cache
+        oldest = None
+        for key in cache:
+            if oldest is None or cache[key][1] < cache[oldest][1]:
+                oldest = key
+        self.glyph_bytes -= len(cache.pop(oldest)[0])
+    def Glyph_Clear(self):
+        self.glyph_cache = {}
+        self.glyph_bytes = 0
     def Show_Signal_CN(self, x, y, char, font, color, backcolor = None):
         if font == None:
             return
@@ -644,7 +1073,7 @@ class LCD_35_ST7796(object):
         if backcolor is not None:
             color_buf = bytearray(backcolor.to_bytes(2, 'big') * chw * chh)
         else:
-            color_buf = self.Read_Region(x, y, chw, chh)
+            color_buf = self.Shadow_Region(x, y, chw, chh)
         for i in range(chh):
             pdata = int.from_bytes(cn_data[i * bytes_line:(i + 1) * bytes_line], 'big')
             for j in range(chw):
@@ -652,22 +1081,78 @@ class LCD_35_ST7796(object):
                     color_buf[(i * chw + j) * 2] = color >> 8
                     color_buf[(i * chw + j) * 2 + 1] = color & 0xFF
                 pdata <<= 1
-        self.LCD_Set_Windows(x, y, x + chw - 1, y + chh - 1)
-        self.lcd_cs(0)
-        self.lcd_rs(1)
-        self.spi.write(color_buf)
-        self.lcd_cs(1)
+        self.Fill_Region(x, y, color_buf, chw, chh)
+    def Show_Glyphs(self, x, y, string, font, color, backcolor = None):
+        chw = font['width']
+        chh = font['height']
+        w = chw * len(string)
+        if self.batch is not None and hasattr(self.batch, 'Add_Glyphs'):
+            self.Shadow_Add(x, y, w, chh, None)
+            self.batch.Add_Glyphs(x, y, string, font, color, backcolor)
+            return
+        size = 2 * w * chh
+        if len(self.text_buf) < size:
+            self.text_buf = bytearray(size)
+        buf = memoryview(self.text_buf)[:size]
+        bg = backcolor
+        if bg is None:
+            bg = self.Shadow_Solid(x, y, w, chh)
+        row = 2 * chw
+        if bg is not None:
+            for k in range(len(string)):
+                glyph = memoryview(self.Glyph_Get(font, ord(string[k]) - 32, color, bg))
+                for i in range(chh):
+                    pos = (i * w + k * chw) * 2
+                    buf[pos:pos + row] = glyph[i * row:(i + 1) * row]
+        else:
+            self.Shadow_Region(x, y, w, chh, buf)
+            bytes_line = (chw + 7) // 8
+            data = font["data"]
+            hi = color >> 8
+            lo = color & 0xFF
+            for k in range(len(string)):
+                offset = bytes_line * chh * (ord(string[k]) - 32)
+                for i in range(chh):
+                    pos = (i * w + k * chw) * 2
+                    col = 0
+                    for b in range(bytes_line):
+                        byte = data[offset + i * bytes_line + b]
+                        for n in (byte >> 4, byte & 0xF):
+                            for j in NIBBLE_BITS[n]:
+                                if col + j < chw:
+                                    buf[pos + (col + j) * 2] = hi
+                                    buf[pos + (col + j) * 2 + 1] = lo
+                            col += 4
+        self.Shadow_Add(x, y, w, chh, None)
+        self.LCD_Write_Window(x, y, w, chh, buf)
     def Show_String(self, x, y, string, font, color, backcolor = None):
+        txns = self.spi_txns
         x0 = x
         chw = font['width']
         chh = font['height'] 
-        for char in string:
+        first = font.get('start')
+        run = 0
+        run_x = x
+        for i in range(len(string)):
+            char = string[i]
             num = ord(char)
-            if num >= 0 and num <= 255:
-                self.Show_Char(x, y, char, font, color, backcolor)
-            else: 
-                self.Show_Signal_CN(x, y, char, font, color, backcolor)             
+            if num <= 255 and first is not None and num - 32 >= first and num - 32 <= font['end']:
+                run += 1
+            else:
+                if run:
+                    self.Show_Glyphs(run_x, y, string[i - run:i], font, color, backcolor)
+                    run = 0
+                if num > 255:
+                    self.Show_Signal_CN(x, y, char, font, color, backcolor)
+                run_x = x + chw
             x += chw
             if (x + chw) > self.lcd_width:
+                if run:
+                    self.Show_Glyphs(run_x, y, string[i + 1 - run:i + 1], font, color, backcolor)
+                    run = 0
                 x = x0
-                y += chh       
\ No newline at end of file
+                y += chh
+                run_x = x
+        if run:
+            self.Show_Glyphs(run_x, y, string[len(string) - run:], font, color, backcolor)
+        self.last_string_txns = self.spi_txns - txns
@@ -0,0 +1,76 @@
+from Band_Renderer import Canvas
+
+#pre-rendered widgets kept for reuse, least recently used dropped first
+SPRITE_CACHE_BYTES = 16384
+
+class Sprite_Sink(object):
+    def __init__(self, lcd, canvas, x, y):
+        self.lcd = lcd
+        self.canvas = canvas
+        self.x = x
+        self.y = y
+        self.ops = 0
+    def Clear(self):
+        self.ops = 0
+    def Flush(self, lcd):
+        pass
+    def Add(self, x, y, w, h, color):
+        self.canvas.Fill_Rect(x - self.x, y - self.y, w, h, color)
+    def Add_Glyphs(self, x, y, string, font, color, backcolor = None):
+        self.canvas.Show_Glyphs(self.lcd, x - self.x, y - self.y, string, font, color, backcolor)
+    def Add_Region(self, x, y, buf, w, h):
+        self.canvas.Blit(buf, x - self.x, y - self.y, w, h)
+
+class Sprite_Cache(object):
+    def __init__(self, lcd, budget = SPRITE_CACHE_BYTES):
+        self.lcd = lcd
+        self.budget = budget
+        self.cache = {}
+        self.bytes = 0
+        self.tick = 0
+        self.hits = 0
+        self.misses = 0
+    def Draw(self, key, x, y, w, h, render):
+        #render draws the widget at its screen position; only the w x h box at x, y is kept.
+        #key None renders without caching
+        self.tick += 1
+        entry = self.cache.get(key) if key is not None else None
+        if entry is None:
+            self.misses += 1
+            if key is None or 2 * w * h > self.budget:
+                self.lcd.Fill_Region(x, y, self.Render(x, y, w, h, render), w, h)
+                return
+            entry = [self.Render(x, y, w, h, render), self.tick]
+            self.cache[key] = entry
+            self.bytes += len(entry[0])
+            while self.bytes > self.budget:
+                self.Evict()
+        else:
+            self.hits += 1
+        entry[1] = self.tick
+        self.lcd.Fill_Region(x, y, entry[0], w, h)
+    def Render(self, x, y, w, h, render):
+        lcd = self.lcd
+        buf = bytearray(2 * w * h)
+        batch = lcd.batch
+        depth = lcd.batch_depth
+        shadow = lcd.shadow
+        #nothing reaches the panel or the shadow while the sprite is painted
+        lcd.batch = Sprite_Sink(lcd, Canvas(buf, w, h), x, y)
+        lcd.batch_depth = 0
+        lcd.Shadow_Reset()
+        render()
+        lcd.batch = batch
+        lcd.batch_depth = depth
+        lcd.shadow = shadow
+        return buf
+    def Evict(self):
+        cache = self.cache
+        oldest = None
+        for key in cache:
+            if oldest is None or cache[key][1] < cache[oldest][1]:
+                oldest = key
+        self.bytes -= len(cache.pop(oldest)[0])
+    def Clear(self):
+        self.cache = {}
+        self.bytes = 0
@@ -0,0 +1,70 @@
+class Aircraft:
+    """One visible aircraft, refilled in place from each poll's state vector"""
+
+    # CPython drops the per-instance dict; MicroPython ignores __slots__,
+    # there the saving comes from reusing records instead of new dicts
+    __slots__ = ("icao24", "callsign", "origin", "lat", "lon", "alt", "distance_km",
+                 "bearing", "velocity", "track", "pos_time", "age")
+
+    def __init__(self):
+        self.icao24 = None
+        self.callsign = None
+        self.origin = None
+        self.lat = 0.0
+        self.lon = 0.0
+        self.alt = 0
+        self.distance_km = 0.0
+        self.bearing = 0
+        self.velocity = None
+        self.track = None
+        self.pos_time = None
+        self.age = 0
+
+    def fill(self, state, distance, bearing):
+        self.icao24 = state[0]
+        self.callsign = state[1]
+        self.origin = state[2]
+        self.pos_time = state[3]
+        self.lon = state[5]
+        self.lat = state[6]
+        self.alt = int(state[7])
+        self.velocity = state[9]
+        self.track = state[10]
+        self.distance_km = round(distance, 1)
+        self.bearing = int(bearing)
+        self.age = 0
+        return self
+
+class AircraftPool:
+    """Aircraft records reused from poll to poll.
+
+    A poll takes a record for every plane it keeps and gives back the ones
+    it drops. Its list, once published, is the newest generation; the one
+    before may still be in the motion model or on screen until the render
+    loop picks up the new list, so only the generation before that one is
+    freed for the next poll.
+    """
+
+    def __init__(self):
+        self.free = []
+        self.current = []
+        self.previous = []
+        self.allocated = 0
+
+    def take(self):
+        if self.free:
+            return self.free.pop()
+        self.allocated += 1
+        return Aircraft()
+
+    def give(self, record):
+        self.free.append(record)
+
+    def release(self, records):
+        # Records of a poll that was dropped or failed
+        self.free.extend(records)
+
+    def commit(self, planes):
+        self.free.extend(self.previous)
+        self.previous = self.current
+        self.current = planes
@@ -1,6 +1,11 @@
 from machine import SPI, Pin
 from ST7796 import LCD_35_ST7796, SPI_W_SPEED, Delay_Ms
+from Band_Renderer import Band_Renderer
+from Indexed_Frame import Indexed_Frame
+from Sprite_Cache import Sprite_Cache
+from Numeric_Readout import Numeric_Readout
 from Font_6x12_EN import Font_6x12_EN
+from utils import EARTH_RADIUS_KM
 import time
 import math
 
@@ -35,9 +40,45 @@ spi = SPI(1,baudrate=SPI_W_SPEED,sck=Pin(LCD_SCK),mosi=Pin(LCD_SDA),miso=Pin(LCD
 mylcd = LCD_35_ST7796(spi, LCD_CS, LCD_RS, LCD_BL)
 mylcd.LCD_Set_Rotate(1)
 
+# Frames are composed in RAM and each changed pixel sent once. The default
+# composes a band at a time (~19 KB); the indexed mode keeps the whole screen
+# at 4 bits per pixel (~75 KB) and snaps colours outside the palette to the
+# nearest entry
+INDEXED_FRAME = False
+FRAME_PALETTE = [DEEP_BLACK, DARK_PURPLE, MEDIUM_PURPLE, BRIGHT_PURPLE, NEON_PURPLE,
+                 NEON_PINK, NEON_CYAN, NEON_GREEN, GRID_PURPLE, TERMINAL_GREEN,
+                 AMBER, ORANGE_RED, GRAY_BLUE, SCAN_LINE, WHITE]
+if INDEXED_FRAME:
+    renderer = Indexed_Frame(mylcd, FRAME_PALETTE)
+else:
+    renderer = Band_Renderer(mylcd)
+
+# Static widget artwork, rendered once and blitted in one write
+sprites = Sprite_Cache(mylcd)
+
+# Flat-earth kilometres per degree, good enough at radar-trail scale
+KM_PER_DEG = EARTH_RADIUS_KM * math.pi / 180
+# Vertical speed (m/s, about 500 ft/min) shown as climbing or descending
+CLIMB_RATE_MS = 2.5
+
+# Readouts repaint only the digit cells that changed
+tracking_readout = Numeric_Readout(mylcd, 10, 50, "TRACKING:", 3, "_AIRCRAFT", Font_6x12_EN)
+nearest_readout = Numeric_Readout(mylcd, 180, 50, "NEAREST:", 3, "KM", Font_6x12_EN)
+
 # Global state tracking
 display_initialized = False
 last_plane_count = -1
+# Panels stay bound to an aircraft (by icao24) while it is on screen; each
+# slot holds the owner and the field values last drawn, or None when empty
+panel_slots = []
+# Range/altitude/heading readouts of each slot
+panel_readouts = []
+last_overflow = 0
+last_stale = None
+# Visible aircraft in the last snapshot, the plane list may hold fewer
+last_total = 0
+# Position history of the aircraft, for trails and climb indicators
+last_tracks = None
 content_area_y = 70
 content_area_height = 0
 
@@ -81,7 +122,7 @@ def draw_cyberpunk_border(x, y, width, height, color=NEON_PURPLE):
 
 def initialize_static_display():
     """Draw all static elements once"""
-    global display_initialized, content_area_height
+    global display_initialized, content_area_height, last_plane_count, last_overflow, last_stale
     
     mylcd.LCD_Clear(DEEP_BLACK)
     draw_scanlines()
@@ -124,13 +165,23 @@ def initialize_static_display():
     
     content_area_height = mylcd.lcd_height - 95
     display_initialized = True
+    
+    # Everything below has to be drawn again
+    last_plane_count = -1
+    del panel_slots[:]
+    tracking_readout.Reset()
+    nearest_readout.Reset()
+    last_overflow = 0
+    last_stale = None
 
 def draw_status_led(x, y, color, text):
     """Draw a small status LED with text"""
     # LED with glow effect
+    mylcd.Begin_Batch()
     mylcd.Fill_Circle(x, y, 3, color)
     mylcd.Fill_Circle(x, y, 1, WHITE)
     mylcd.Draw_Circle(x, y, 4, color)
+    mylcd.End_Batch()
     
     # Status text
     mylcd.Show_String(x + 8, y - 6, text, Font_6x12_EN, color)
@@ -178,9 +229,10 @@ def get_distance_color_cyber(distance):
     else:
         return GRAY_BLUE
 
-def draw_radar_compass(x, y, bearing):
-    """Draw a retro radar-style compass"""
+def draw_compass_face(x, y, y_pos, is_priority):
+    """Draw the panel backdrop and the static compass face, for the sprite cache"""
     radius = 15
+    draw_panel_backdrop(y_pos, is_priority)
     
     # Clear the area first
     mylcd.Fill_Circle(x, y, radius + 2, DARK_PURPLE)
@@ -200,6 +252,42 @@ def draw_radar_compass(x, y, bearing):
     
     # Center dot
     mylcd.Fill_Circle(x, y, 2, NEON_GREEN)
+
+def trail_points(plane, reach):
+    """Pixel offsets from the radar centre of the plane's recent positions, as a tuple"""
+    if last_tracks is None or last_tracks.length(plane.icao24) < 2:
+        return None
+    # The user sits at the centre; samples are placed relative to the
+    # plane's current bearing and range, north up
+    rad = math.radians(plane.bearing)
+    east = plane.distance_km * math.sin(rad)
+    north = plane.distance_km * math.cos(rad)
+    km_per_lon = KM_PER_DEG * math.cos(math.radians(plane.lat))
+    points = []
+    far = plane.distance_km
+    for lat, lon in last_tracks.points(plane.icao24):
+        e = east + (lon - plane.lon) * km_per_lon
+        n = north + (lat - plane.lat) * KM_PER_DEG
+        points.append((e, n))
+        far = max(far, math.sqrt(e * e + n * n))
+    # Scaled so the farthest point still falls inside the scope
+    scale = reach / max(far, 0.1)
+    return tuple((int(round(e * scale)), -int(round(n * scale))) for e, n in points)
+
+def draw_radar_compass(x, y, bearing, y_pos, is_priority=False, trail=None):
+    """Draw a retro radar-style compass, the face blitted from the sprite cache"""
+    radius = 15
+    box = 2 * (radius + 2) + 1
+    
+    # Record the whole compass and send it as merged spans
+    mylcd.Begin_Batch()
+    sprites.Draw(("compass", is_priority), x - radius - 2, y - radius - 2, box, box,
+                 lambda: draw_compass_face(x, y, y_pos, is_priority))
+    
+    # Where the aircraft has been, as radar blips under the needle
+    if trail:
+        for dx, dy in trail:
+            mylcd.Draw_Point(x + dx, y + dy, NEON_GREEN)
     
     # Bearing indicator
     rad = math.radians(bearing - 90)
@@ -208,47 +296,81 @@ def draw_radar_compass(x, y, bearing):
     
     mylcd.Draw_line(x, y, end_x, end_y, NEON_CYAN)
     mylcd.Fill_Circle(end_x, end_y, 2, NEON_CYAN)
+    mylcd.End_Batch()
 
 def clear_content_area():
     """Clear only the content area for updates"""
     mylcd.Fill_Rect(10, content_area_y, mylcd.lcd_width - 20, content_area_height, DEEP_BLACK)
+    # The overflow bar is wider than the content area
+    clear_overflow_bar()
+
+def clear_overflow_bar():
+    """Blank the whole "more aircraft" bar"""
+    global last_overflow
+    mylcd.Fill_Rect(5, mylcd.lcd_height - 50, mylcd.lcd_width - 10, 15, DEEP_BLACK)
+    last_overflow = 0
 
 def update_info_bar(plane_count, closest_dist=None):
     """Update just the info bar text"""
     info_y = 45
-    # Clear text area
-    mylcd.Fill_Rect(5, info_y + 2, mylcd.lcd_width - 10, 16, MEDIUM_PURPLE)
+    if tracking_readout.text is None or (closest_dist is None and nearest_readout.text is not None):
+        # Clear text area
+        mylcd.Fill_Rect(5, info_y + 2, mylcd.lcd_width - 10, 16, MEDIUM_PURPLE)
+        tracking_readout.Reset(MEDIUM_PURPLE)
+        nearest_readout.Reset(MEDIUM_PURPLE)
     
     # Update plane count
-    if plane_count < 10:
-        count_text = "TRACKING:0" + str(plane_count) + "_AIRCRAFT"
-    else:
-        count_text = "TRACKING:" + str(plane_count) + "_AIRCRAFT"
-    mylcd.Show_String(10, info_y + 5, count_text, Font_6x12_EN, NEON_GREEN)
+    tracking_readout.Draw(plane_count, NEON_GREEN)
     
     # Update closest distance
     if closest_dist is not None:
-        closest_val = int(closest_dist)
-        if closest_val < 10:
-            nearest_text = "NEAREST:00" + str(closest_val) + "KM"
-        elif closest_val < 100:
-            nearest_text = "NEAREST:0" + str(closest_val) + "KM"
-        else:
-            nearest_text = "NEAREST:" + str(closest_val) + "KM"
-        mylcd.Show_String(180, info_y + 5, nearest_text, Font_6x12_EN, NEON_PINK)
+        nearest_readout.Draw(closest_dist, NEON_PINK)
 
-def update_status_activity():
+def update_status_activity(stale=False):
     """Update just the activity indicator in status bar"""
+    global last_stale
+    if stale == last_stale:
+        return
+    last_stale = stale
     status_y = mylcd.lcd_height - 25
     # Clear activity area
     mylcd.Fill_Rect(mylcd.lcd_width - 70, status_y + 5, 65, 15, DEEP_BLACK)
     
-    mylcd.Show_String(mylcd.lcd_width - 60, status_y + 8, "ACTIVE", Font_6x12_EN, NEON_PINK)
-    # Blinking dot
-    mylcd.Fill_Circle(mylcd.lcd_width - 10, status_y + 12, 3, NEON_GREEN)
+    # Stale means the last fetch missed its deadline and old data is shown
+    if stale:
+        mylcd.Show_String(mylcd.lcd_width - 60, status_y + 8, "STALE", Font_6x12_EN, ORANGE_RED)
+        mylcd.Fill_Circle(mylcd.lcd_width - 10, status_y + 12, 3, AMBER)
+    else:
+        mylcd.Show_String(mylcd.lcd_width - 60, status_y + 8, "ACTIVE", Font_6x12_EN, NEON_PINK)
+        # Blinking dot
+        mylcd.Fill_Circle(mylcd.lcd_width - 10, status_y + 12, 3, NEON_GREEN)
 
-def draw_data_panel(plane, y_pos, is_priority=False):
-    """Draw a cyberpunk data panel for each aircraft"""
+SPINNER = "|/-\\"
+
+def animate_status(tick, stale=False, fetching=False):
+    """Blink the activity dot and spin a fetch indicator between redraws"""
+    if not display_initialized:
+        return
+    status_y = mylcd.lcd_height - 25
+    dot_color = AMBER if stale else NEON_GREEN
+    renderer.Begin()
+    mylcd.Fill_Circle(mylcd.lcd_width - 10, status_y + 12, 3, dot_color if tick % 2 else DEEP_BLACK)
+    spin = SPINNER[tick % 4] if fetching else " "
+    mylcd.Show_String(mylcd.lcd_width - 68, status_y + 8, spin, Font_6x12_EN, NEON_CYAN, DEEP_BLACK)
+    renderer.End()
+
+def make_panel_readouts(y_pos):
+    """Create the range/altitude/heading readouts of the panel slot at y_pos"""
+    panel_width = mylcd.lcd_width - 20
+    x = 10
+    return {
+        'rng': Numeric_Readout(mylcd, x + panel_width - 80, y_pos + 8, "RNG:", 3, "KM", Font_6x12_EN),
+        'alt': Numeric_Readout(mylcd, x + 5, y_pos + 25, "ALT:", 5, "M", Font_6x12_EN),
+        'hdg': Numeric_Readout(mylcd, x + panel_width - 100, y_pos + 25, "HDG:", 3, "", Font_6x12_EN),
+    }
+
+def draw_panel_chrome(y_pos, is_priority):
+    """Draw the static panel plate, border and grid"""
     panel_height = 60
     panel_width = mylcd.lcd_width - 20
     x = 10
@@ -264,56 +386,122 @@ def draw_data_panel(plane, y_pos, is_priority=False):
     
     # Grid pattern in background
     draw_grid_pattern(x+2, y_pos+2, panel_width-4, panel_height-4)
-    
-    # Aircraft icon
+
+def draw_panel_backdrop(y_pos, is_priority):
+    """Draw what lies under the panel sprites"""
+    panel_width = mylcd.lcd_width - 20
+    panel_bg = DARK_PURPLE if is_priority else MEDIUM_PURPLE
+    draw_panel_chrome(y_pos, is_priority)
+    # The RNG plate reaches into the compass box; its bottom rows are blank
+    mylcd.Fill_Rect(10 + panel_width - 80, y_pos + 8, 54, 12, panel_bg)
+
+def draw_panel_icon(y_pos, is_priority):
+    """Draw the panel backdrop and the aircraft icon, for the sprite cache"""
+    draw_panel_backdrop(y_pos, is_priority)
     icon_color = NEON_PINK if is_priority else NEON_CYAN
-    draw_retro_plane_icon(x + 20, y_pos + 15, icon_color)
+    draw_retro_plane_icon(30, y_pos + 15, icon_color)
+
+def climb_trend(plane):
+    """1 climbing, -1 descending, 0 level or unknown, from the track history"""
+    rate = last_tracks.climb_rate(plane.icao24) if last_tracks is not None else None
+    if rate is None or abs(rate) < CLIMB_RATE_MS:
+        return 0
+    return 1 if rate > 0 else -1
+
+def panel_fields(plane):
+    """The text fields a data panel shows, kept per slot to repaint only changes"""
+    return {
+        'id': "ID:" + (plane.callsign if plane.callsign is not None else '[UNKNOWN]')[:10],
+        'hdg': int(plane.bearing),
+        'from': "FROM:" + (plane.origin if plane.origin is not None else 'UNK')[:8],
+        # The dots move with the plane's dead-reckoned position, not just new samples
+        'trail': trail_points(plane, 12),
+        'climb': climb_trend(plane),
+    }
+
+def draw_climb_indicator(y_pos, is_priority, climb, backdrop=True):
+    """Draw the climb/descent arrow after the altitude readout"""
+    text = "^" if climb > 0 else "v" if climb < 0 else " "
+    color = NEON_GREEN if climb > 0 else ORANGE_RED
+    if backdrop:
+        draw_panel_field(y_pos, is_priority, 10 + 67, y_pos + 25, 1, text, color)
+    elif climb:
+        mylcd.Show_String(10 + 67, y_pos + 25, text, Font_6x12_EN, color)
+
+def draw_panel_field(y_pos, is_priority, x, y, chars, text, color):
+    """Repaint a transparent text field over its slice of the panel backdrop"""
+    sprites.Draw(None, x, y, chars * Font_6x12_EN['width'], Font_6x12_EN['height'],
+                 lambda: draw_panel_backdrop(y_pos, is_priority))
+    mylcd.Show_String(x, y, text, Font_6x12_EN, color)
+
+def draw_panel_readouts(plane, readouts, y_pos, is_priority, compass, trail):
+    """Draw the range/altitude/heading readouts and, when asked or needed, the compass"""
+    panel_width = mylcd.lcd_width - 20
+    x = 10
     
-    # Callsign with terminal styling
-    callsign = plane.get('callsign', '[UNKNOWN]')[:10]
-    mylcd.Show_String(x + 35, y_pos + 8, "ID:" + callsign, Font_6x12_EN, NEON_CYAN)
-    
-    # Distance with digital readout style
-    dist_color = get_distance_color_cyber(plane['distance_km'])
-    dist_val = int(plane['distance_km'])
-    if dist_val < 10:
-        dist_text = "RNG:00" + str(dist_val) + "KM"
-    elif dist_val < 100:
-        dist_text = "RNG:0" + str(dist_val) + "KM"
-    else:
-        dist_text = "RNG:" + str(dist_val) + "KM"
-    mylcd.Show_String(x + panel_width - 80, y_pos + 8, dist_text, Font_6x12_EN, dist_color)
+    # Distance with digital readout style; a full redraw covers the top of the compass
+    if readouts['rng'].Draw(plane.distance_km, get_distance_color_cyber(plane.distance_km)):
+        compass = True
     
     # Altitude with color coding
-    alt_color = get_altitude_color_cyber(plane['alt'])
-    alt_val = int(plane['alt'])
-    alt_str = str(alt_val)
-    while len(alt_str) < 5:
-        alt_str = "0" + alt_str
-    alt_text = "ALT:" + alt_str + "M"
-    mylcd.Show_String(x + 5, y_pos + 25, alt_text, Font_6x12_EN, alt_color)
+    readouts['alt'].Draw(plane.alt, get_altitude_color_cyber(plane.alt))
+    
+    # Bearing with compass
+    readouts['hdg'].Draw(plane.bearing, AMBER)
+    if compass:
+        draw_radar_compass(x + panel_width - 25, y_pos + 35, plane.bearing, y_pos, is_priority, trail)
+
+def update_data_panel(plane, slot, readouts, y_pos):
+    """Repaint only the fields of a panel whose values changed"""
+    x = 10
+    is_priority = slot['priority']
+    fields = panel_fields(plane)
+    if fields['id'] != slot['id']:
+        draw_panel_field(y_pos, is_priority, x + 35, y_pos + 8, 13, fields['id'], NEON_CYAN)
+    if fields['from'] != slot['from']:
+        draw_panel_field(y_pos, is_priority, x + 5, y_pos + 40, 13, fields['from'], GRAY_BLUE)
+    if fields['climb'] != slot['climb']:
+        draw_climb_indicator(y_pos, is_priority, fields['climb'])
+    draw_panel_readouts(plane, readouts, y_pos, is_priority,
+                        fields['hdg'] != slot['hdg'] or fields['trail'] != slot['trail'], fields['trail'])
+    slot.update(fields)
+
+def draw_data_panel(plane, readouts, y_pos, is_priority=False):
+    """Draw a cyberpunk data panel for each aircraft"""
+    x = 10
+    panel_bg = DARK_PURPLE if is_priority else MEDIUM_PURPLE
+    draw_panel_chrome(y_pos, is_priority)
+    
+    # Aircraft icon
+    sprites.Draw(("icon", is_priority), x + 12, y_pos + 11, 16, 8,
+                 lambda: draw_panel_icon(y_pos, is_priority))
+    
+    fields = panel_fields(plane)
+    
+    # Callsign with terminal styling
+    mylcd.Show_String(x + 35, y_pos + 8, fields['id'], Font_6x12_EN, NEON_CYAN)
     
     # Origin with data format
-    country = plane.get('origin', 'UNK')[:8]
-    mylcd.Show_String(x + 5, y_pos + 40, "FROM:" + country, Font_6x12_EN, GRAY_BLUE)
+    mylcd.Show_String(x + 5, y_pos + 40, fields['from'], Font_6x12_EN, GRAY_BLUE)
     
-    # Bearing with compass
-    bearing_val = int(plane['bearing'])
-    if bearing_val < 10:
-        bearing_text = "HDG:00" + str(bearing_val)
-    elif bearing_val < 100:
-        bearing_text = "HDG:0" + str(bearing_val)
-    else:
-        bearing_text = "HDG:" + str(bearing_val)
-    mylcd.Show_String(x + panel_width - 100, y_pos + 25, bearing_text, Font_6x12_EN, AMBER)
-    draw_radar_compass(x + panel_width - 25, y_pos + 35, plane['bearing'])
+    # Range and heading sit on solid plates, the altitude over the grid
+    readouts['rng'].Reset(panel_bg)
+    readouts['alt'].Reset(None, lambda bx, by, bw, bh: sprites.Render(bx, by, bw, bh, lambda: draw_panel_backdrop(y_pos, is_priority)))
+    readouts['hdg'].Reset(panel_bg)
+    draw_panel_readouts(plane, readouts, y_pos, is_priority, True, fields['trail'])
+    draw_climb_indicator(y_pos, is_priority, fields['climb'], False)
     
     # Data stream effect (moving dots)
     for i in range(3):
         dot_x = x + 150 + i * 15
         mylcd.Fill_Circle(dot_x, y_pos + 45, 1, TERMINAL_GREEN)
+    return fields
 
-def draw_no_signal_screen():
+def clear_panel_slot(y_pos):
+    """Blank a panel slot, border decorations included"""
+    mylcd.Fill_Rect(8, y_pos - 2, mylcd.lcd_width - 16, 64, DEEP_BLACK)
+
+def draw_no_signal_screen(stale=False):
     """Draw screen when no aircraft detected - cyberpunk style"""
     if not display_initialized:
         initialize_static_display()
@@ -342,58 +530,143 @@ def draw_no_signal_screen():
     mylcd.Show_String(80, center_y + 115, "SCANNING AIRSPACE...", Font_6x12_EN, TERMINAL_GREEN)
     mylcd.Show_String(100, center_y + 130, "STANDBY MODE", Font_6x12_EN, NEON_CYAN)
     
-    update_status_activity()
+    update_status_activity(stale)
+
+def panel_capacity():
+    """Number of aircraft panels the content area has room for"""
+    panel_height = 60
+    panel_spacing = 5
+    return (mylcd.lcd_height - 95) // (panel_height + panel_spacing)
+
+def show_planes(planes, stale=False, total=None, tracks=None):
+    """Main display function, composed off-screen and flushed band by band"""
+    renderer.Begin()
+    draw_planes(planes, stale, total, tracks)
+    renderer.End()
 
-def show_planes(planes):
-    """Main display function with optimized updates"""
-    global last_plane_count
+def draw_planes(planes, stale=False, total=None, tracks=None):
+    """Draw the aircraft panels, repainting only what changed"""
+    global last_plane_count, last_overflow, last_total, last_tracks
+    
+    # The planes may be only the nearest few of total visible ones
+    if total is None or total < len(planes):
+        total = len(planes)
+    last_total = total
+    last_tracks = tracks
     
     # Initialize static elements if needed
     if not display_initialized:
         initialize_static_display()
     
     if not planes:
-        draw_no_signal_screen()
-        last_plane_count = 0
+        if last_plane_count != 0:
+            # Panel borders reach past the content area, start from a clean screen
+            if last_plane_count > 0:
+                initialize_static_display()
+            draw_no_signal_screen(stale)
+            last_plane_count = 0
+            del panel_slots[:]
+        update_status_activity(stale)
         return
     
-    # Only clear and redraw if plane count changed significantly
-    current_count = len(planes)
-    if abs(current_count - last_plane_count) > 0:
-        clear_content_area()
-        last_plane_count = current_count
-    
-    # Update info bar
-    closest_dist = planes[0]['distance_km'] if planes else None
-    update_info_bar(current_count, closest_dist)
-    
     # Calculate display area
     panel_height = 60
     panel_spacing = 5
     max_planes = content_area_height // (panel_height + panel_spacing)
     
-    # Display aircraft panels
-    planes_to_show = min(len(planes), max_planes)
+    # The no-signal radar rings reach into the header and the info bar
+    if last_plane_count == 0:
+        initialize_static_display()
+    # Coming from the no-signal screen (or a fresh one) the panels start over
+    if last_plane_count < 0:
+        clear_content_area()
+        del panel_slots[:]
+    while len(panel_slots) < max_planes:
+        panel_slots.append(None)
+    while len(panel_readouts) < max_planes:
+        panel_readouts.append(make_panel_readouts(content_area_y + len(panel_readouts) * (panel_height + panel_spacing)))
     
-    for i in range(planes_to_show):
-        plane = planes[i]
+    # Update info bar
+    update_info_bar(total, planes[0].distance_km)
+    last_plane_count = total
+    
+    # Aircraft still on screen keep their slot, newcomers take the free ones
+    shown = planes[:max_planes]
+    by_id = {}
+    for plane in shown:
+        by_id[plane.icao24] = plane
+    owners = []
+    for slot in panel_slots:
+        owners.append(slot['icao24'] if slot is not None and slot['icao24'] in by_id else None)
+    newcomers = [plane for plane in shown if plane.icao24 not in owners]
+    for i in range(max_planes):
+        if owners[i] is None and newcomers:
+            owners[i] = newcomers.pop(0).icao24
+    
+    # Highlight the closest target wherever its panel is
+    nearest_id = shown[0].icao24
+    for i in range(max_planes):
+        slot = panel_slots[i]
         panel_y = content_area_y + i * (panel_height + panel_spacing)
-        is_priority = (i == 0)  # Highlight closest target
-        draw_data_panel(plane, panel_y, is_priority)
+        if owners[i] is None:
+            if slot is not None:
+                clear_panel_slot(panel_y)
+                panel_slots[i] = None
+            continue
+        plane = by_id[owners[i]]
+        is_priority = owners[i] == nearest_id
+        if slot is None or slot['icao24'] != owners[i] or slot['priority'] != is_priority:
+            if slot is not None and slot['priority']:
+                # The highlight outline sits outside a normal panel
+                clear_panel_slot(panel_y)
+            slot = draw_data_panel(plane, panel_readouts[i], panel_y, is_priority)
+            slot['icao24'] = owners[i]
+            slot['priority'] = is_priority
+            panel_slots[i] = slot
+        else:
+            update_data_panel(plane, slot, panel_readouts[i], panel_y)
     
     # Overflow indicator
-    if len(planes) > planes_to_show:
-        remaining = len(planes) - planes_to_show
-        overflow_y = mylcd.lcd_height - 50
-        mylcd.Fill_Rect(5, overflow_y, mylcd.lcd_width - 10, 15, DARK_PURPLE)
-        if remaining < 10:
-            remaining_text = ">>> 0" + str(remaining) + " MORE AIRCRAFT IN RANGE <<<"
+    remaining = total - len(shown)
+    overflow_y = mylcd.lcd_height - 50
+    if remaining != last_overflow:
+        if remaining:
+            mylcd.Fill_Rect(5, overflow_y, mylcd.lcd_width - 10, 15, DARK_PURPLE)
+            if remaining < 10:
+                remaining_text = ">>> 0" + str(remaining) + " MORE AIRCRAFT IN RANGE <<<"
+            else:
+                remaining_text = ">>> " + str(remaining) + " MORE AIRCRAFT IN RANGE <<<"
+            mylcd.Show_String(10, overflow_y + 3, remaining_text, Font_6x12_EN, AMBER)
+            last_overflow = remaining
         else:
-            remaining_text = ">>> " + str(remaining) + " MORE AIRCRAFT IN RANGE <<<"
-        mylcd.Show_String(10, overflow_y + 3, remaining_text, Font_6x12_EN, AMBER)
+            clear_overflow_bar()
     
     # Update activity indicator
-    update_status_activity()
+    update_status_activity(stale)
+
+def update_motion(planes):
+    """Redraw only the range/heading readouts that dead reckoning changed"""
+    if not display_initialized or not planes:
+        return
+    renderer.Begin()
+    draw_motion(planes)
+    renderer.End()
+
+def draw_motion(planes):
+    """Draw the readouts of update_motion"""
+    update_info_bar(max(last_total, len(planes)), min(plane.distance_km for plane in planes))
+    
+    by_id = {}
+    for plane in planes:
+        by_id[plane.icao24] = plane
+    for i in range(len(panel_slots)):
+        slot = panel_slots[i]
+        plane = by_id.get(slot['icao24']) if slot is not None else None
+        if plane is None:
+            continue
+        panel_height = 60
+        panel_spacing = 5
+        update_data_panel(plane, slot, panel_readouts[i], content_area_y + i * (panel_height + panel_spacing))
 
 # Function to force full redraw (call this occasionally or on errors)
 def force_refresh():
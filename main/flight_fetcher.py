@@ -1,58 +1,396 @@
-import urequests as requests
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+import heapq
+import json
 import math
 import time
 from config import USER_LAT, USER_LON, DELTA, WINDOW_DIR, FOV_DEG, MAX_RADIUS_KM, MAX_ALT_M
-from utils import haversine_distance, calculate_bearing, is_within_view
+from utils import Observer, ticks_ms, ticks_diff, ticks_add
+from state_stream import StateStreamParser, iter_stream
+from http_client import HttpClient, is_timeout
+from aircraft import AircraftPool
+from track_store import TrackStore
+import geo_batch
 
-def get_visible_planes():
-    lamin = USER_LAT - DELTA
-    lamax = USER_LAT + DELTA
-    lomin = USER_LON - DELTA
-    lomax = USER_LON + DELTA
-    url = "https://opensky-network.org/api/states/all?lamin={}&lomin={}&lamax={}&lomax={}".format(lamin, lomin, lamax, lomax)
+# Parse the response incrementally instead of building the whole states list
+STREAM_STATES = True
+STREAM_CHUNK_SIZE = 512
 
+# Keep only the nearest TOP_K visible planes (None keeps them all); the
+# display shows a few panels plus a count, so the rest are only counted
+TOP_K = None
+
+# On a host with numpy, filter whole responses with the vectorized kernel
+USE_BATCH = geo_batch.available()
+
+OPENSKY_HOST = "opensky-network.org"
+OPENSKY_PORT = 443
+OPENSKY_SSL = True
+
+# Hard limit for one whole fetch (connect, request and body), so a stalled
+# connection can't freeze the display loop
+FETCH_DEADLINE_MS = 8000
+# How long a fetch sleeps between checks while waiting on the socket
+IO_POLL_MS = 20
+
+# One kept-alive connection for every poll instead of a new TLS handshake
+client = HttpClient(OPENSKY_HOST, OPENSKY_PORT, OPENSKY_SSL)
+
+FILTER_STAGES = ("position", "altitude", "box", "sector", "distance", "view")
+filter_stats = {}
+
+# Built once at startup and reused on every poll
+observer = Observer(USER_LAT, USER_LON, WINDOW_DIR, FOV_DEG, MAX_RADIUS_KM)
+
+def reset_filter_stats():
+    filter_stats["checked"] = 0
+    filter_stats["visible"] = 0
+    for stage in FILTER_STAGES:
+        filter_stats[stage] = 0
+
+reset_filter_stats()
+
+def query_box():
+    # Only the FOV wedge out to MAX_RADIUS_KM can pass the filters, so ask
+    # for the rectangle around it, never more than the configured DELTA square
+    lamin, lomin, lamax, lomax = observer.query_box()
+    lamin = max(lamin, USER_LAT - DELTA)
+    lomin = max(lomin, USER_LON - DELTA)
+    lamax = min(lamax, USER_LAT + DELTA)
+    lomax = min(lomax, USER_LON + DELTA)
+    return lamin, lomin, lamax, lomax
+
+QUERY_BOX = query_box()
+# Fraction of the old DELTA square that is still requested
+QUERY_AREA_RATIO = (QUERY_BOX[2] - QUERY_BOX[0]) * (QUERY_BOX[3] - QUERY_BOX[1]) / (4.0 * DELTA * DELTA)
+
+def query_credits(box):
+    # OpenSky charges API credits by the area of the request box
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    if area <= 25:
+        return 1
+    if area <= 100:
+        return 2
+    if area <= 400:
+        return 3
+    return 4
+
+QUERY_CREDITS = query_credits(QUERY_BOX)
+
+fetch_stats = {
+    "status": None,
+    "retry_after_s": None,
+    "credits_remaining": None,
+    "time": None,
+    "duplicates": 0,
+    "approach_eta_s": None,
+    "total": 0,
+    "bytes": 0,
+    "bytes_saved": 0,
+    "polls": 0,
+    "ok": 0,
+    "timeouts": 0,
+    "errors": 0,
+    "last_ms": 0,
+    "max_ms": 0,
+    "total_ms": 0,
+}
+
+def record_fetch(outcome, elapsed_ms):
+    fetch_stats["polls"] += 1
+    fetch_stats[outcome] += 1
+    fetch_stats["last_ms"] = elapsed_ms
+    fetch_stats["total_ms"] += elapsed_ms
+    if elapsed_ms > fetch_stats["max_ms"]:
+        fetch_stats["max_ms"] = elapsed_ms
+
+def note_approach(lat, dlon, plane):
+    # Track the soonest a currently rejected plane could fly into the view
+    eta = observer.approach_eta(lat, dlon, plane[9], plane[10])
+    if eta is not None:
+        best = fetch_stats["approach_eta_s"]
+        if best is None or eta < best:
+            fetch_stats["approach_eta_s"] = eta
+
+def header_number(headers, name):
     try:
-        res = requests.get(url)
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+# Last fresh result, handed back again when OpenSky repeats a snapshot
+last_planes = []
+
+# Aircraft records are refilled every poll instead of building new ones
+pool = AircraftPool()
+
+# Position history of every visible aircraft, for trails and climb rates
+tracks = TrackStore()
+
+class Nearest:
+    """Bounded max-heap of the k nearest planes seen while streaming"""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.seq = 0
+
+    def admits(self, distance):
+        # heap[0] is the farthest kept plane; a tie loses to the earlier
+        # arrival, which gives the same order as a stable sort
+        if len(self.heap) < self.k:
+            return True
+        return len(self.heap) > 0 and distance < -self.heap[0][0]
+
+    def push(self, distance, item):
+        # Returns the item pushed out of the heap, if any
+        self.seq += 1
+        heapq.heappush(self.heap, (-distance, -self.seq, item))
+        if len(self.heap) > self.k:
+            return heapq.heappop(self.heap)[2]
+        return None
+
+    def items(self):
+        # Nearest first, arrival order among equal distances
+        self.heap.sort(reverse=True)
+        return [entry[2] for entry in self.heap]
+
+def plane_from_state(plane, nearest=None):
+    lon, lat, alt = plane[5], plane[6], plane[7]
+    stats = filter_stats
+    stats["checked"] += 1
+
+    if lat is None or lon is None or alt is None:
+        stats["position"] += 1
+        return None
+
+    # Cheapest tests first, exact trig only for the survivors
+    if alt > MAX_ALT_M:
+        stats["altitude"] += 1
+        return None
+
+    dlon = observer.wrap_dlon(lon)
+    if not observer.in_box(lat, dlon):
+        stats["box"] += 1
+        return None
+
+    if not observer.in_sector(lat, dlon):
+        stats["sector"] += 1
+        note_approach(lat, dlon, plane)
+        return None
+
+    distance = observer.distance(lat, lon)
+    if distance > MAX_RADIUS_KM:
+        stats["distance"] += 1
+        note_approach(lat, dlon, plane)
+        return None
+
+    bearing = observer.bearing(lat, lon)
+    if not observer.in_view(bearing):
+        stats["view"] += 1
+        note_approach(lat, dlon, plane)
+        return None
+
+    stats["visible"] += 1
+    if plane[3] is not None:
+        tracks.append(plane[0], plane[3], lat, lon, alt)
+    # Counted, but no record is filled for a plane that won't be kept
+    if nearest is not None and not nearest.admits(round(distance, 1)):
+        return None
+    return make_plane(plane, distance, bearing)
+
+def make_plane(plane, distance, bearing):
+    return pool.take().fill(plane, distance, bearing)
+
+def set_position_ages(planes, response_time):
+    # Seconds between each position fix and the snapshot, so the motion
+    # model can extrapolate from when the fix was really taken
+    if response_time is None:
+        return
+    for plane in planes:
+        if plane.pos_time is not None:
+            plane.age = max(response_time - plane.pos_time, 0)
+
+def planes_from_states(states, nearest=None):
+    # Columnar version of plane_from_state for large host-side responses
+    np = geo_batch.np
+    lats, lons, alts = geo_batch.columns(states)
+    distance, bearing, has_position, visible = geo_batch.evaluate(observer, lats, lons, alts, MAX_ALT_M)
+    low = has_position & (alts <= MAX_ALT_M)
+    near = low & (distance <= MAX_RADIUS_KM)
+    stats = filter_stats
+    stats["checked"] += len(states)
+    stats["position"] += len(states) - int(np.count_nonzero(has_position))
+    stats["altitude"] += int(np.count_nonzero(has_position)) - int(np.count_nonzero(low))
+    stats["distance"] += int(np.count_nonzero(low)) - int(np.count_nonzero(near))
+    stats["view"] += int(np.count_nonzero(near)) - int(np.count_nonzero(visible))
+    stats["visible"] += int(np.count_nonzero(visible))
+    for i in np.flatnonzero(low & ~visible):
+        note_approach(float(lats[i]), observer.wrap_dlon(float(lons[i])), states[i])
+    chosen = np.flatnonzero(visible)
+    for i in chosen:
+        state = states[i]
+        if state[3] is not None:
+            tracks.append(state[0], state[3], state[6], state[5], state[7])
+    if nearest is not None:
+        for i in chosen:
+            d = round(float(distance[i]), 1)
+            if nearest.admits(d):
+                nearest.push(d, i)
+        chosen = nearest.items()
+    return [make_plane(states[i], float(distance[i]), float(bearing[i])) for i in chosen]
+
+def fetch_steps(deadline_ms=FETCH_DEADLINE_MS, top_k=TOP_K):
+    # Generator doing one fetch; it yields whenever it would otherwise wait
+    # on the network (True) or has just parsed a chunk (False), and returns
+    # the plane list, the previous list again if OpenSky repeated its last
+    # snapshot, or None when no fresh data arrived. With top_k only the
+    # nearest top_k planes are returned and fetch_stats["total"] has the
+    # full visible count
+    global last_planes
+    lamin, lomin, lamax, lomax = QUERY_BOX
+    path = "/api/states/all?lamin={}&lomin={}&lamax={}&lomax={}".format(lamin, lomin, lamax, lomax)
+
+    visible_planes = []
+    nearest = Nearest(top_k) if top_k is not None else None
+    reset_filter_stats()
+    fetch_stats["approach_eta_s"] = None
+    # Left None unless this poll gets a response
+    fetch_stats["status"] = None
+    fetch_stats["retry_after_s"] = None
+
+    def keep(state):
+        plane = plane_from_state(state, nearest)
+        if plane is None:
+            return
+        if nearest is not None:
+            dropped = nearest.push(plane.distance_km, plane)
+            if dropped is not None:
+                pool.give(dropped)
+        else:
+            visible_planes.append(plane)
+
+    def taken():
+        # Records this poll holds so far
+        return nearest.items() if nearest is not None else visible_planes
+
+    started = ticks_ms()
+    res = None
+    try:
+        stream = STREAM_STATES and not USE_BATCH
+        client.send(path, deadline=ticks_add(started, deadline_ms))
+        while not client.readable():
+            yield True
+        res = client.receive()
+        fetch_stats["status"] = res.status_code
+        fetch_stats["retry_after_s"] = header_number(res.headers, "x-rate-limit-retry-after-seconds")
+        remaining = header_number(res.headers, "x-rate-limit-remaining")
+        if remaining is not None:
+            fetch_stats["credits_remaining"] = remaining
         if res.status_code != 200:
             print("Failed to get data, status:", res.status_code)
-            return []
-        data = res.json()
+            res.close()
+            record_fetch("errors", ticks_diff(ticks_ms(), started))
+            return None
+        if USE_BATCH:
+            body = res.content
+            nbytes = len(body)
+            data = json.loads(body)
+            states = data.get("states") or []
+            checked = len(states)
+            visible_planes = planes_from_states(states, nearest)
+            nearest = None
+            response_time = data.get("time")
+        elif stream:
+            # Each state vector is filtered as soon as it is tokenized and
+            # dropped if rejected, so peak memory follows the visible count
+            parser = StateStreamParser(keep, reuse=True)
+            for waiting in iter_stream(res.raw, parser, STREAM_CHUNK_SIZE):
+                # "time" leads the response, so a repeat is spotted early
+                if parser.time is not None and parser.time == fetch_stats["time"]:
+                    break
+                yield waiting
+            checked = parser.count
+            nbytes = parser.bytes_read
+            response_time = parser.time
+        else:
+            body = res.content
+            nbytes = len(body)
+            data = json.loads(body)
+            states = data.get("states") or []
+            checked = len(states)
+            response_time = data.get("time")
+            for state in states:
+                keep(state)
         res.close()  # Important to close response to free memory
     except Exception as e:
-        print("Request error:", e)
-        return []
-    
-    visible_planes = []
-    states = data.get("states", [])
-    print("Checking {} planes".format(len(states)))
-
-    for plane in states:
-        icao24 = plane[0]
-        callsign = plane[1]
-        origin_country = plane[2]
-        lon, lat, alt = plane[5], plane[6], plane[7]
-
-        if lat is None or lon is None or alt is None:
-            continue
-
-        distance = haversine_distance(USER_LAT, USER_LON, lat, lon)
-        if distance > MAX_RADIUS_KM or alt > MAX_ALT_M:
-            continue
-
-        bearing = calculate_bearing(USER_LAT, USER_LON, lat, lon)
-        if not is_within_view(bearing, WINDOW_DIR, FOV_DEG):
-            continue
-
-        visible_planes.append({
-            "callsign": callsign,
-            "icao24": icao24,
-            "origin": origin_country,
-            "lat": lat,
-            "lon": lon,
-            "alt": int(alt),
-            "distance_km": round(distance, 1),
-            "bearing": int(bearing)
-        })
-    
-    visible_planes.sort(key=lambda item: item.get("distance_km", float('inf')))
+        elapsed = ticks_diff(ticks_ms(), started)
+        if is_timeout(e):
+            print("Request timed out after {}ms".format(elapsed))
+            record_fetch("timeouts", elapsed)
+        else:
+            print("Request error:", e)
+            record_fetch("errors", elapsed)
+        # Whatever the server still sends must not be read as the next
+        # response, so the connection goes with it
+        if res is not None:
+            res.abort()
+        else:
+            client.close()
+        pool.release(taken())
+        return None
+
+    record_fetch("ok", ticks_diff(ticks_ms(), started))
+
+    if response_time is not None and response_time == fetch_stats["time"]:
+        fetch_stats["duplicates"] += 1
+        print("Snapshot {} unchanged, skipped".format(response_time))
+        pool.release(taken())
+        return last_planes
+    fetch_stats["time"] = response_time
+
+    # Assumes traffic is spread evenly over the old square
+    fetch_stats["bytes"] = nbytes
+    if QUERY_AREA_RATIO > 0:
+        fetch_stats["bytes_saved"] = int(nbytes / QUERY_AREA_RATIO) - nbytes
+    print("Checking {} planes ({} bytes, ~{} saved by query box)".format(checked, nbytes, fetch_stats["bytes_saved"]))
+    print("Rejected: alt {altitude} | box {box} | sector {sector} | dist {distance} | view {view} | no pos {position}".format(**filter_stats))
+
+    fetch_stats["total"] = filter_stats["visible"]
+    if nearest is not None:
+        # Already in order, only the k kept planes were ever compared
+        visible_planes = nearest.items()
+    else:
+        visible_planes.sort(key=lambda item: item.distance_km)
+    set_position_ages(visible_planes, response_time)
+    pool.commit(visible_planes)
+    # Planes that will be shown keep their history even in a full store;
+    # the nearest claim last so they are the last to go
+    for plane in reversed(visible_planes[:tracks.capacity]):
+        if plane.pos_time is not None:
+            tracks.append(plane.icao24, plane.pos_time, plane.lat, plane.lon, plane.alt, True)
+    tracks.end_poll()
+    last_planes = visible_planes
     return visible_planes
+
+def get_visible_planes(deadline_ms=FETCH_DEADLINE_MS, top_k=TOP_K):
+    steps = fetch_steps(deadline_ms, top_k)
+    try:
+        while True:
+            if next(steps):
+                time.sleep(IO_POLL_MS / 1000)
+    except StopIteration as done:
+        return done.value
+
+async def get_visible_planes_async(deadline_ms=FETCH_DEADLINE_MS, top_k=TOP_K):
+    # Same fetch, but the event loop gets control back while the request is
+    # in flight so rendering can carry on
+    steps = fetch_steps(deadline_ms, top_k)
+    try:
+        while True:
+            waiting = next(steps)
+            await asyncio.sleep(IO_POLL_MS / 1000 if waiting else 0)
+    except StopIteration as done:
+        return done.value
@@ -0,0 +1,63 @@
+import sys
+
+# Host-only: MicroPython has no numpy, so the scalar Observer path stays the
+# default there
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils import EARTH_RADIUS_KM
+
+def available():
+    return np is not None and sys.implementation.name != "micropython"
+
+def columns(states):
+    # OpenSky state vectors -> float arrays, with missing values as NaN
+    n = len(states)
+    lats = np.full(n, np.nan)
+    lons = np.full(n, np.nan)
+    alts = np.full(n, np.nan)
+    for i, state in enumerate(states):
+        lon, lat, alt = state[5], state[6], state[7]
+        if lat is not None and lon is not None and alt is not None:
+            lats[i] = lat
+            lons[i] = lon
+            alts[i] = alt
+    return lats, lons, alts
+
+def distances(observer, lats, lons):
+    dlat = np.radians(lats - observer.lat)
+    dlon = np.radians(lons - observer.lon)
+    a = np.sin(dlat / 2) ** 2 + observer.cos_lat * np.cos(np.radians(lats)) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+def bearings(observer, lats, lons):
+    lat2 = np.radians(lats)
+    dlon = np.radians(lons) - np.radians(observer.lon)
+    cos_lat2 = np.cos(lat2)
+    x = np.sin(dlon) * cos_lat2
+    y = observer.cos_lat * np.sin(lat2) - observer.sin_lat * cos_lat2 * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+def view_mask(observer, bearing):
+    lower, upper = observer.view_lower, observer.view_upper
+    if lower < upper:
+        return (bearing >= lower) & (bearing <= upper)
+    return (bearing >= lower) | (bearing <= upper)
+
+def evaluate(observer, lats, lons, alts, max_alt):
+    """Vectorized equivalent of the scalar filter for columnar lat/lon/alt.
+
+    Returns (distance_km, bearing, has_position, visible) arrays.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    alts = np.asarray(alts, dtype=float)
+    has_position = ~(np.isnan(lats) | np.isnan(lons) | np.isnan(alts))
+    with np.errstate(invalid="ignore"):
+        distance = distances(observer, lats, lons)
+        bearing = bearings(observer, lats, lons)
+        visible = has_position & (alts <= max_alt) & (distance <= observer.max_radius_km)
+        visible &= view_mask(observer, bearing)
+    return distance, bearing, has_position, visible
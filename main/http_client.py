@@ -0,0 +1,344 @@
+try:
+    import usocket as socket
+except ImportError:
+    import socket
+try:
+    import ussl as ssl
+except ImportError:
+    import ssl
+try:
+    import uselect as select
+except ImportError:
+    import select
+import json
+from utils import ticks_ms, ticks_diff
+
+ETIMEDOUT = 110
+
+CONNECT_TIMEOUT_S = 10
+READ_TIMEOUT_S = 10
+
+# Longest status, header or chunk-size line accepted while a deadline is set
+LINE_LIMIT = 2048
+
+# Bodies left unread on close() are drained up to this size so the
+# connection can be reused; anything bigger is cheaper to reconnect
+DRAIN_LIMIT = 4096
+
+def is_timeout(e):
+    # usocket reports ETIMEDOUT, CPython raises socket.timeout
+    return isinstance(e, OSError) and (e.args[:1] == (ETIMEDOUT,) or "timed out" in str(e))
+
+class Response:
+    def __init__(self, client, status_code, headers):
+        self.client = client
+        self.status_code = status_code
+        self.headers = headers
+        self._chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        length = headers.get("content-length")
+        self._remaining = int(length) if length is not None else -1
+        self._chunk_left = 0
+        self._done = self._remaining == 0
+        self._keep_alive = headers.get("connection", "").lower() != "close" and (self._chunked or length is not None)
+
+    @property
+    def raw(self):
+        return self
+
+    def _next_chunk(self):
+        client = self.client
+        line = client._readline()
+        if not line:
+            raise OSError("connection closed mid-body")
+        size = int(line.split(b";")[0].strip(), 16)
+        if size == 0:
+            # Trailers end with an empty line
+            while client._readline() not in (b"\r\n", b"\n", b""):
+                pass
+            self._done = True
+        self._chunk_left = size
+
+    def readable(self):
+        return self._done or self.client.readable()
+
+    def readinto(self, buf):
+        if self._done:
+            return 0
+        want = len(buf)
+        if self._chunked:
+            if self._chunk_left == 0:
+                self._next_chunk()
+                if self._done:
+                    return 0
+            want = min(want, self._chunk_left)
+        elif self._remaining >= 0:
+            want = min(want, self._remaining)
+        n = self.client._read_once(memoryview(buf)[:want])
+        if not n:
+            if self._remaining < 0 and not self._chunked:
+                self._done = True  # Body delimited by connection close
+                return 0
+            raise OSError("connection closed mid-body")
+        if self._chunked:
+            self._chunk_left -= n
+            if self._chunk_left == 0:
+                self.client._readline()  # CRLF after each chunk
+        elif self._remaining >= 0:
+            self._remaining -= n
+            if self._remaining == 0:
+                self._done = True
+        return n
+
+    def read(self, size=-1):
+        out = bytearray()
+        buf = bytearray(512)
+        while size < 0 or len(out) < size:
+            n = self.readinto(buf if size < 0 else memoryview(buf)[:min(512, size - len(out))])
+            if not n:
+                break
+            out.extend(memoryview(buf)[:n])
+        return bytes(out)
+
+    @property
+    def content(self):
+        return self.read()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        if self.client is None:
+            return
+        if self._keep_alive and not self._done:
+            self._drain()
+        if not (self._keep_alive and self._done):
+            self.client.close()
+        self.client._active = None
+        self.client = None
+
+    def abort(self):
+        # Drop the connection with the rest of the body unread, after a
+        # failure part way through; draining would eat into the next request
+        if self.client is None:
+            return
+        self.client.close()
+        self.client._active = None
+        self.client = None
+
+    def _drain(self):
+        buf = bytearray(256)
+        drained = 0
+        try:
+            while drained < DRAIN_LIMIT:
+                n = self.readinto(buf)
+                if not n:
+                    break
+                drained += n
+        except OSError:
+            pass
+
+class HttpClient:
+    """Keep-alive HTTP(S) client for polling a single host.
+
+    The connection is kept open between requests and reopened transparently
+    when the server or the network drops it. With a deadline every read
+    checks the time left for the whole request and takes only what has
+    arrived, so a server trickling bytes can't stretch a request past it.
+    The DNS lookup can't be bounded: the address is resolved once and only
+    looked up again after a failed connect.
+    """
+
+    def __init__(self, host, port=443, use_ssl=True, connect_timeout=CONNECT_TIMEOUT_S, read_timeout=READ_TIMEOUT_S):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._addr = None
+        self._sock = None
+        self._stream = None
+        self._active = None
+        self._poller = None
+        self._pending = None
+        self._reused = False
+        # Optional ticks_ms() value after which every socket operation fails
+        self.deadline = None
+        self.connects = 0
+        self.requests = 0
+
+    def _connect(self):
+        self._time_left(0)
+        if self._addr is None:
+            self._addr = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)[0][-1]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self._time_left(self.connect_timeout))
+            sock.connect(self._addr)
+            if self.use_ssl:
+                if hasattr(ssl, "create_default_context"):
+                    sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+                else:
+                    sock = ssl.wrap_socket(sock, server_hostname=self.host)
+            sock.settimeout(self.read_timeout)
+        except Exception:
+            sock.close()
+            self._addr = None  # Resolve again next time in case the host moved
+            raise
+        self._sock = sock
+        # CPython sockets need a file wrapper for readline/readinto,
+        # MicroPython sockets are streams already
+        self._stream = sock.makefile("rb") if hasattr(sock, "makefile") else sock
+        if hasattr(select, "poll"):
+            self._poller = select.poll()
+            self._poller.register(sock, select.POLLIN)
+        self.connects += 1
+
+    def _time_left(self, timeout):
+        # Shrink a socket timeout to whatever is left before the deadline
+        if self.deadline is None:
+            return timeout
+        left = ticks_diff(self.deadline, ticks_ms())
+        if left <= 0:
+            raise OSError(ETIMEDOUT, "deadline exceeded")
+        return min(timeout, left / 1000)
+
+    def _arm(self):
+        if self.deadline is not None:
+            self._sock.settimeout(self._time_left(self.read_timeout))
+
+    def _read_once(self, mv):
+        # One read of whatever has arrived, never waiting past the deadline
+        self._arm()
+        stream = self._stream
+        if self.deadline is None:
+            return stream.readinto(mv)
+        # CPython's buffered file: at most one recv, under the armed timeout
+        readinto1 = getattr(stream, "readinto1", None)
+        if readinto1 is not None:
+            return readinto1(mv)
+        if self._poller is None:
+            return stream.readinto(mv)
+        # MicroPython streams block until the buffer is full, so wait with
+        # poll and read without blocking
+        while True:
+            left = ticks_diff(self.deadline, ticks_ms())
+            if left <= 0 or not self._poller.poll(min(left, self.read_timeout * 1000)):
+                raise OSError(ETIMEDOUT, "deadline exceeded")
+            self._sock.setblocking(False)
+            try:
+                n = stream.readinto(mv)
+            finally:
+                self._sock.setblocking(True)
+            # None when TLS has no complete record yet
+            if n is not None:
+                return n
+
+    def _readline(self):
+        if self.deadline is None:
+            return self._stream.readline()
+        # A byte at a time so the deadline is checked between reads
+        line = bytearray()
+        byte = bytearray(1)
+        while len(line) < LINE_LIMIT:
+            if not self._read_once(memoryview(byte)):
+                break
+            line.append(byte[0])
+            if byte[0] == 0x0A:
+                break
+        return bytes(line)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                if self._stream is not self._sock:
+                    self._stream.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._stream = None
+        self._poller = None
+
+    def _send(self, data):
+        write = getattr(self._sock, "write", None) or self._sock.sendall
+        write(data)
+
+    def _write_request(self):
+        path, headers = self._pending
+        req = "GET {} HTTP/1.1\r\nHost: {}\r\nConnection: keep-alive\r\n".format(path, self.host)
+        for name in headers:
+            req += "{}: {}\r\n".format(name, headers[name])
+        self._arm()
+        self._send((req + "\r\n").encode())
+
+    def _read_response(self):
+        line = self._readline()
+        if not line:
+            raise OSError("connection closed")
+        status = int(line.split(None, 2)[1])
+        resp_headers = {}
+        while True:
+            line = self._readline()
+            if not line or line == b"\r\n" or line == b"\n":
+                break
+            name, _, value = line.decode().partition(":")
+            resp_headers[name.strip().lower()] = value.strip()
+        self._active = Response(self, status, resp_headers)
+        return self._active
+
+    def readable(self):
+        # True when the next read won't block. CPython's buffered file can
+        # hide data from poll once a body is being read, so from then on
+        # every read is treated as ready there
+        self._time_left(0)
+        if self._poller is None or (self._active is not None and self._stream is not self._sock):
+            return True
+        return bool(self._poller.poll(0))
+
+    def send(self, path, headers=None, deadline=None):
+        # First half of get(): the response can be collected with receive()
+        # once readable() says it has arrived
+        self.deadline = deadline
+        if self._active is not None:
+            # The caller never closed the previous response
+            self._active.close()
+        self.requests += 1
+        self._pending = (path, headers or {})
+        self._reused = self._sock is not None
+        if not self._reused:
+            self._connect()
+        try:
+            self._write_request()
+        except OSError:
+            self.close()
+            if not self._reused:
+                raise
+            self._reconnect()
+
+    def receive(self):
+        try:
+            return self._read_response()
+        except (OSError, ValueError, IndexError):
+            self.close()
+            if not self._reused:
+                raise
+        # The kept-alive connection had gone stale, retry once on a fresh one
+        self._reconnect()
+        try:
+            return self._read_response()
+        except Exception:
+            self.close()
+            raise
+
+    def _reconnect(self):
+        self._reused = False
+        self._connect()
+        try:
+            self._write_request()
+        except Exception:
+            self.close()
+            raise
+
+    def get(self, path, headers=None, deadline=None):
+        self.send(path, headers, deadline)
+        return self.receive()
@@ -1,18 +1,45 @@
-import time
-
 from wifi_connect import connect_to_wifi
-from flight_fetcher import get_visible_planes
-from display_controller import show_planes
+from flight_fetcher import get_visible_planes_async, fetch_stats, observer, tracks, QUERY_CREDITS
+from display_controller import show_planes, animate_status, update_motion, panel_capacity
+from motion import MotionModel
+from poll_scheduler import PollScheduler
+from tasks import run
 
 connect_to_wifi()
 
-while True:
+# Only as many planes as there are panels are kept and sorted, the rest
+# are just counted
+PANELS = panel_capacity()
+
+scheduler = PollScheduler(QUERY_CREDITS)
+
+async def fetch():
     print("Checking visible planes...")
-    planes = get_visible_planes()
-    print("Found {} visible plane(s):".format(len(planes)))
-    show_planes(planes)
+    planes = await get_visible_planes_async(top_k=PANELS)
+    if planes is None:
+        print("No fresh data, keeping last planes as stale")
+    else:
+        print("Found {} visible plane(s), nearest {}:".format(fetch_stats["total"], len(planes)))
+    print("Fetch: last {}ms | max {}ms | avg {}ms | {} timeout(s) in {} poll(s)".format(
+        fetch_stats["last_ms"], fetch_stats["max_ms"], fetch_stats["total_ms"] // max(fetch_stats["polls"], 1),
+        fetch_stats["timeouts"], fetch_stats["polls"]
+    ))
+    scheduler.record(fetch_stats, None if planes is None else fetch_stats["total"])
+    print("Next poll in {}ms | credits used {} | remaining {} | rate limited {}x".format(
+        scheduler.interval_ms, scheduler.credits_used, scheduler.credits_remaining, scheduler.rate_limited
+    ))
+    return planes
+
+def render(planes, stale):
+    # fetch_stats["total"] and tracks are updated together with the
+    # snapshot being drawn
+    show_planes(planes, stale, fetch_stats["total"], tracks)
     for p in planes:
         print("✈️ {} | Alt: {}m | Dist: {}km | Bearing: {}° | From: {}".format(
-            p['callsign'] or '[no callsign]', p['alt'], p['distance_km'], p['bearing'], p['origin']
+            p.callsign or '[no callsign]', p.alt, p.distance_km, p.bearing, p.origin
         ))
-    time.sleep(10)
\ No newline at end of file
+
+# Fetch and render run as separate tasks, so the display keeps animating
+# while a request is in flight; between polls planes are dead-reckoned and
+# the scheduler decides how long "between polls" is
+run(fetch, render, animate_status, scheduler, MotionModel(observer), update_motion)
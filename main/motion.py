@@ -0,0 +1,52 @@
+import math
+from utils import EARTH_RADIUS_KM, ticks_ms, ticks_diff
+
+# Metres per degree of latitude
+M_PER_DEG = EARTH_RADIUS_KM * 1000 * math.pi / 180
+
+# Stop extrapolating once a fix is this old, a missed poll shouldn't send
+# planes sailing off on a straight line forever
+MAX_EXTRAPOLATE_S = 30
+
+class MotionModel:
+    """Dead-reckons visible aircraft between polls from speed and track.
+
+    update() takes each new plane list once per poll; advance() moves every
+    plane to the current time and recomputes its distance and bearing. Both
+    are linear in the number of visible aircraft.
+    """
+
+    def __init__(self, observer):
+        self.observer = observer
+        self.planes = []
+        self._bases = []
+
+    def update(self, planes):
+        now = ticks_ms()
+        bases = []
+        for plane in planes:
+            velocity = plane.velocity
+            track = plane.track
+            if velocity is None or track is None:
+                dlat = dlon = 0.0
+            else:
+                rad = math.radians(track)
+                dlat = velocity * math.cos(rad) / M_PER_DEG
+                dlon = velocity * math.sin(rad) / (M_PER_DEG * max(math.cos(math.radians(plane.lat)), 0.01))
+            bases.append((plane.lat, plane.lon, dlat, dlon, plane.age, now))
+        self.planes = planes
+        self._bases = bases
+
+    def advance(self):
+        now = ticks_ms()
+        observer = self.observer
+        for plane, base in zip(self.planes, self._bases):
+            lat0, lon0, dlat, dlon, age, tick = base
+            dt = min(age + ticks_diff(now, tick) / 1000, MAX_EXTRAPOLATE_S)
+            lat = lat0 + dlat * dt
+            lon = lon0 + dlon * dt
+            plane.lat = lat
+            plane.lon = lon
+            plane.distance_km = round(observer.distance(lat, lon), 1)
+            plane.bearing = int(observer.bearing(lat, lon))
+        return self.planes
@@ -0,0 +1,65 @@
+MIN_INTERVAL_MS = 5000       # OpenSky doesn't refresh states faster than this
+BASE_INTERVAL_MS = 10000
+IDLE_INTERVAL_MS = 30000     # Empty sky with nothing heading our way
+BUSY_COUNT = 3               # Visible planes at which we poll as fast as allowed
+MAX_BACKOFF_MS = 300000
+LOW_CREDITS = 50             # Slow down when the daily allowance runs short
+
+class PollScheduler:
+    """Picks the delay before the next OpenSky poll.
+
+    Busy skies and aircraft about to enter the view shorten the interval, an
+    empty sky stretches it, and HTTP 429 backs off exponentially (or for as
+    long as the rate-limit headers ask).
+    """
+
+    def __init__(self, credits_per_poll=1):
+        self.credits_per_poll = credits_per_poll
+        self.interval_ms = BASE_INTERVAL_MS
+        self.backoff_ms = 0
+        self.credits_used = 0
+        self.credits_remaining = None
+        self.rate_limited = 0
+
+    def record(self, stats, visible):
+        # stats is flight_fetcher.fetch_stats after a poll, visible the
+        # number of planes returned (None if the fetch failed); status is
+        # None when no response came back, which neither costs credits nor
+        # counts as rate limiting
+        status = stats["status"]
+        if stats["credits_remaining"] is not None:
+            self.credits_remaining = stats["credits_remaining"]
+        if status == 429:
+            self.rate_limited += 1
+            retry_after = stats["retry_after_s"]
+            if retry_after is not None:
+                self.backoff_ms = retry_after * 1000
+            else:
+                self.backoff_ms = min(max(self.backoff_ms * 2, BASE_INTERVAL_MS), MAX_BACKOFF_MS)
+            self.interval_ms = self.backoff_ms
+            return
+        self.backoff_ms = 0
+        if status == 200:
+            self.credits_used += self.credits_per_poll
+        if visible is None:
+            self.interval_ms = BASE_INTERVAL_MS
+            return
+
+        eta = stats["approach_eta_s"]
+        if visible >= BUSY_COUNT:
+            interval = MIN_INTERVAL_MS
+        elif visible:
+            interval = BASE_INTERVAL_MS
+        elif eta is None:
+            interval = IDLE_INTERVAL_MS
+        else:
+            interval = BASE_INTERVAL_MS
+        # Be polling again by the time the next plane should come into view
+        if eta is not None and eta * 1000 < interval:
+            interval = max(int(eta * 1000), MIN_INTERVAL_MS)
+        if self.credits_remaining is not None and self.credits_remaining < LOW_CREDITS:
+            interval = max(interval, IDLE_INTERVAL_MS)
+        self.interval_ms = interval
+
+    def next_interval_ms(self):
+        return self.interval_ms
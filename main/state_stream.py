@@ -0,0 +1,217 @@
+import json
+from array import array
+
+STATES_KEY = b"states"
+TIME_KEY = b"time"
+
+QUOTE = 0x22      # "
+BACKSLASH = 0x5C  # \
+LBRACKET = 0x5B   # [
+RBRACKET = 0x5D   # ]
+LBRACE = 0x7B     # {
+RBRACE = 0x7D     # }
+COLON = 0x3A      # :
+COMMA = 0x2C      # ,
+MINUS = 0x2D      # -
+DOT = 0x2E        # .
+NULL = b"null"
+TRUE = b"true"
+WHITESPACE = b" \t\r\n"
+
+# Room for the 17 or 18 fields of a state vector before the offsets grow
+FIELDS = 18
+
+def decode_field(buf, start, end):
+    # One JSON scalar of buf[start:end]; nested values fall back to json
+    while start < end and buf[start] in WHITESPACE:
+        start += 1
+    while end > start and buf[end - 1] in WHITESPACE:
+        end -= 1
+    first = buf[start]
+    if first == QUOTE:
+        if buf.find(b"\\", start, end) < 0:
+            return str(buf[start + 1:end - 1], "utf-8")
+    elif first == MINUS or 0x30 <= first <= 0x39:
+        text = str(buf[start:end], "ascii")
+        if buf.find(b".", start, end) < 0 and buf.find(b"e", start, end) < 0 and buf.find(b"E", start, end) < 0:
+            return int(text)
+        return float(text)
+    elif buf[start:end] == NULL:
+        return None
+    elif buf[start:end] == TRUE:
+        return True
+    elif first == 0x66:  # f
+        return False
+    return json.loads(buf[start:end])
+
+class StateVector:
+    """A state vector read in place from the parser's capture buffer.
+
+    Fields are decoded only when indexed, so rejected aircraft never get
+    their callsign or country turned into strings. The same object is
+    handed out for every vector and is only valid inside on_state.
+    """
+
+    def __init__(self):
+        self.buf = None
+        # Offsets of the commas between fields, then of the closing bracket
+        self.ends = array("H", [0] * FIELDS)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("state field out of range")
+        start = self.ends[i - 1] + 1 if i else 1
+        return decode_field(self.buf, start, self.ends[i])
+
+class StateStreamParser:
+    """Incremental tokenizer for the OpenSky /states/all response.
+
+    Bytes are fed in arbitrary chunks; every completed state vector is decoded
+    on its own and handed to on_state, so only one vector is held at a time.
+    With reuse, on_state gets one StateVector for every vector instead of a
+    new list, and must not keep it.
+    """
+
+    def __init__(self, on_state, reuse=False):
+        self.on_state = on_state
+        self._view = StateVector() if reuse else None
+        self.time = None
+        self.count = 0
+        self.bytes_read = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._key = None
+        self._last_key = None
+        self._in_states = False
+        self._vec = bytearray()
+        self._capturing = False
+        self._scalar = None
+
+    def feed(self, chunk):
+        self.bytes_read += len(chunk)
+        depth = self._depth
+        in_str = self._in_str
+        esc = self._esc
+        start = 0 if (self._capturing or self._key is not None) else -1
+        i = 0
+        for b in chunk:
+            if in_str:
+                if esc:
+                    esc = False
+                elif b == BACKSLASH:
+                    esc = True
+                elif b == QUOTE:
+                    in_str = False
+                    if depth == 1 and self._key is not None:
+                        self._key.extend(chunk[start:i])
+                        self._last_key = bytes(self._key)
+                        self._key = None
+                        start = -1
+            elif b == QUOTE:
+                in_str = True
+                if depth == 1:
+                    self._key = bytearray()
+                    start = i + 1
+            elif b == LBRACKET or b == LBRACE:
+                depth += 1
+                if depth == 2 and self._last_key == STATES_KEY:
+                    self._in_states = True
+                elif depth == 3 and self._in_states:
+                    self._capturing = True
+                    start = i
+            elif b == RBRACKET or b == RBRACE:
+                depth -= 1
+                if depth == 2 and self._capturing:
+                    self._field_end(len(self._vec) + i - start)
+                    self._vec.extend(chunk[start:i + 1])
+                    self._capturing = False
+                    start = -1
+                    self._emit()
+                elif depth == 1:
+                    self._in_states = False
+                elif depth == 0:
+                    self._end_scalar()
+            elif b == COMMA and depth == 3 and self._capturing:
+                self._field_end(len(self._vec) + i - start)
+            elif depth == 1:
+                if b == COLON:
+                    if self._last_key == TIME_KEY:
+                        self._scalar = bytearray()
+                elif b == COMMA:
+                    self._end_scalar()
+                elif self._scalar is not None:
+                    self._scalar.append(b)
+            i += 1
+        if self._capturing:
+            self._vec.extend(chunk[start:])
+        elif self._key is not None:
+            self._key.extend(chunk[start:])
+        self._depth = depth
+        self._in_str = in_str
+        self._esc = esc
+
+    def _end_scalar(self):
+        if self._scalar is not None:
+            try:
+                self.time = int(self._scalar)
+            except ValueError:
+                self.time = None
+            self._scalar = None
+
+    def _field_end(self, pos):
+        view = self._view
+        if view is None:
+            return
+        if view.count == len(view.ends):
+            view.ends.append(pos)
+        else:
+            view.ends[view.count] = pos
+        view.count += 1
+
+    def _emit(self):
+        self.count += 1
+        view = self._view
+        if view is not None:
+            view.buf = self._vec
+            self.on_state(view)
+            view.count = 0
+            self._vec[:] = b""
+            return
+        state = json.loads(self._vec)
+        # Reuse the capture buffer for the next vector instead of reallocating
+        self._vec[:] = b""
+        self.on_state(state)
+
+def iter_stream(stream, parser, chunk_size):
+    # Generator that yields between socket reads so an event loop can run
+    # other work; yields True while waiting for data, False after a chunk
+    buf = bytearray(chunk_size)
+    mv = memoryview(buf)
+    readinto = getattr(stream, "readinto", None)
+    readable = getattr(stream, "readable", None)
+    while True:
+        while readable is not None and not readable():
+            yield True
+        if readinto is not None:
+            n = readinto(buf)
+        else:
+            data = stream.read(chunk_size)
+            n = len(data) if data else 0
+            if n:
+                buf[:n] = data
+        if not n:
+            break
+        parser.feed(mv[:n])
+        yield False
+
+def read_stream(stream, parser, chunk_size):
+    for _ in iter_stream(stream, parser, chunk_size):
+        pass
+    return parser
@@ -0,0 +1,75 @@
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from utils import ticks_ms, ticks_diff
+
+# 5 frames a second, enough for dead-reckoned readouts to move smoothly
+FRAME_MS = 200
+
+class Snapshot:
+    """Latest-value slot shared by the fetch and render tasks"""
+
+    def __init__(self):
+        self.planes = []
+        self.stale = False
+        self.fetching = False
+        self.seq = 0
+
+    def publish(self, planes):
+        self.planes = planes
+        self.stale = False
+        self.seq += 1
+
+    def mark_stale(self):
+        # Keep the last good planes, only flag them as old
+        if not self.stale:
+            self.stale = True
+            self.seq += 1
+
+async def sleep_ms(ms):
+    await asyncio.sleep(ms / 1000)
+
+async def fetch_loop(snapshot, fetch, scheduler):
+    """Fetch at the scheduler's cadence and drop each result into the snapshot"""
+    while True:
+        started = ticks_ms()
+        snapshot.fetching = True
+        planes = await fetch()
+        snapshot.fetching = False
+        if planes is None:
+            snapshot.mark_stale()
+        elif planes is not snapshot.planes:
+            # The same list back means OpenSky repeated its snapshot
+            snapshot.publish(planes)
+        await sleep_ms(max(scheduler.next_interval_ms() - ticks_diff(ticks_ms(), started), 0))
+
+async def render_loop(snapshot, render, animate, frame_ms, motion=None, update=None):
+    """Redraw when a new snapshot lands, animate and dead-reckon otherwise"""
+    seen = -1
+    tick = 0
+    while True:
+        if snapshot.seq != seen:
+            seen = snapshot.seq
+            # A stale mark republishes the same planes, which are already
+            # extrapolated, so only rebase on a genuinely new list
+            if motion is not None and snapshot.planes is not motion.planes:
+                motion.update(snapshot.planes)
+            render(snapshot.planes, snapshot.stale)
+        else:
+            if motion is not None and motion.planes:
+                update(motion.advance())
+            animate(tick, snapshot.stale, snapshot.fetching)
+        tick += 1
+        await sleep_ms(frame_ms)
+
+async def main_loop(fetch, render, animate, scheduler, motion=None, update=None, frame_ms=FRAME_MS):
+    snapshot = Snapshot()
+    await asyncio.gather(
+        fetch_loop(snapshot, fetch, scheduler),
+        render_loop(snapshot, render, animate, frame_ms, motion, update),
+    )
+
+def run(fetch, render, animate, scheduler, motion=None, update=None, frame_ms=FRAME_MS):
+    # uasyncio on the board, asyncio on a host
+    asyncio.run(main_loop(fetch, render, animate, scheduler, motion, update, frame_ms))
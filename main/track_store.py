@@ -0,0 +1,182 @@
+from array import array
+
+# Samples kept per aircraft, the oldest is overwritten first
+TRACK_HISTORY = 16
+# Cap for the whole store at 16 bytes a sample: 8 KB holds 32 full tracks
+TRACK_MEMORY_BYTES = 8192
+# Forget an aircraft after this many polls without a fresh position
+TRACK_MAX_POLLS = 10
+# Climb rate is taken over at most this many of the latest samples
+CLIMB_SAMPLES = 4
+
+# Positions are stored as ints in 1e-5 degree steps, about a metre
+SCALE = 100000
+# Ints per packed sample: time, lat, lon, alt
+FIELDS = 4
+NONE = -1
+
+class TrackStore:
+    """Recent positions of each aircraft, keyed by icao24.
+
+    Every track is a ring buffer of (time, lat, lon, alt) samples packed as
+    ints in one preallocated array, so the store never grows past its cap.
+    Tracks are chained oldest-seen first: appending a sample, refreshing a
+    track and evicting the stalest one are all O(1). When every slot is
+    taken a new aircraft reuses the slot of the one seen longest ago if that
+    one missed a whole poll; otherwise it is only tracked if it claims a
+    slot, as the planes on screen do.
+    """
+
+    def __init__(self, history=TRACK_HISTORY, memory=TRACK_MEMORY_BYTES, max_polls=TRACK_MAX_POLLS):
+        self.history = history
+        self.max_polls = max_polls
+        self.capacity = max(memory // (4 * FIELDS * history), 1)
+        slots = self.capacity
+        self.samples = array("i", bytes(4 * FIELDS * history * slots))
+        # Per slot: oldest sample, number of samples, poll last seen in
+        self.first = array("H", bytes(2 * slots))
+        self.count = array("H", bytes(2 * slots))
+        self.seen = array("i", bytes(4 * slots))
+        # Oldest-seen-first chain of the slots in use
+        self.prev = array("h", [NONE] * slots)
+        self.next = array("h", [NONE] * slots)
+        self.head = NONE
+        self.tail = NONE
+        self.ids = [None] * slots
+        self.index = {}
+        self.free = list(range(slots - 1, -1, -1))
+        self.poll = 0
+        # Times are kept relative to the first sample so they stay small ints
+        self.epoch = None
+        self.evicted = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def _unlink(self, slot):
+        prev = self.prev[slot]
+        nxt = self.next[slot]
+        if prev == NONE:
+            self.head = nxt
+        else:
+            self.next[prev] = nxt
+        if nxt == NONE:
+            self.tail = prev
+        else:
+            self.prev[nxt] = prev
+
+    def _link(self, slot):
+        self.prev[slot] = self.tail
+        self.next[slot] = NONE
+        if self.tail == NONE:
+            self.head = slot
+        else:
+            self.next[self.tail] = slot
+        self.tail = slot
+
+    def _evict(self, slot):
+        self._unlink(slot)
+        del self.index[self.ids[slot]]
+        self.ids[slot] = None
+        self.free.append(slot)
+        self.evicted += 1
+
+    def _open(self, icao24):
+        if not self.free:
+            self._evict(self.head)
+        slot = self.free.pop()
+        self.ids[slot] = icao24
+        self.index[icao24] = slot
+        self.first[slot] = 0
+        self.count[slot] = 0
+        self.seen[slot] = self.poll
+        self._link(slot)
+        return slot
+
+    def append(self, icao24, time, lat, lon, alt, claim=False):
+        # One position fix; a fix no newer than the last one only marks the
+        # aircraft as seen, OpenSky repeats positions between reports
+        if self.epoch is None:
+            self.epoch = time
+        t = time - self.epoch
+        slot = self.index.get(icao24)
+        if slot is None:
+            if not self.free and self.poll - self.seen[self.head] <= 1 and not claim:
+                # Rather than thrash, keep the histories already running
+                self.dropped += 1
+                return
+            slot = self._open(icao24)
+        elif claim or self.seen[slot] != self.poll:
+            self.seen[slot] = self.poll
+            self._unlink(slot)
+            self._link(slot)
+        history = self.history
+        first = self.first[slot]
+        n = self.count[slot]
+        samples = self.samples
+        base = slot * history
+        if n and samples[(base + (first + n - 1) % history) * FIELDS] >= t:
+            return
+        if n < history:
+            pos = (base + (first + n) % history) * FIELDS
+            self.count[slot] = n + 1
+        else:
+            pos = (base + first) * FIELDS
+            self.first[slot] = (first + 1) % history
+        samples[pos] = t
+        samples[pos + 1] = int(round(lat * SCALE))
+        samples[pos + 2] = int(round(lon * SCALE))
+        samples[pos + 3] = int(alt)
+
+    def end_poll(self):
+        # Drop the aircraft missing for max_polls polls; the stalest are at
+        # the head of the chain, so this stops at the first one still fresh
+        while self.head != NONE and self.poll - self.seen[self.head] >= self.max_polls:
+            self._evict(self.head)
+        self.poll += 1
+
+    def length(self, icao24):
+        slot = self.index.get(icao24)
+        return 0 if slot is None else self.count[slot]
+
+    def sample(self, icao24, i):
+        # The i-th sample, oldest first, negative from the newest, as
+        # (time, lat, lon, alt)
+        slot = self.index[icao24]
+        n = self.count[slot]
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("no such sample")
+        pos = (slot * self.history + (self.first[slot] + i) % self.history) * FIELDS
+        samples = self.samples
+        return (samples[pos] + self.epoch, samples[pos + 1] / SCALE, samples[pos + 2] / SCALE, samples[pos + 3])
+
+    def points(self, icao24):
+        # Oldest to newest (lat, lon), for drawing a trail
+        slot = self.index.get(icao24)
+        if slot is None:
+            return
+        samples = self.samples
+        base = slot * self.history
+        first = self.first[slot]
+        for i in range(self.count[slot]):
+            pos = (base + (first + i) % self.history) * FIELDS
+            yield samples[pos + 1] / SCALE, samples[pos + 2] / SCALE
+
+    def climb_rate(self, icao24, window=CLIMB_SAMPLES):
+        # Metres per second over the latest samples, None with fewer than two
+        n = self.length(icao24)
+        if n < 2:
+            return None
+        t0, _, _, alt0 = self.sample(icao24, -min(n, window))
+        t1, _, _, alt1 = self.sample(icao24, -1)
+        if t1 <= t0:
+            return None
+        return (alt1 - alt0) / (t1 - t0)
+
+    def last_time(self, icao24):
+        if not self.length(icao24):
+            return None
+        return self.sample(icao24, -1)[0]
@@ -1,4 +1,18 @@
 import math
+import time
+
+# MicroPython tick counters, with a CPython fallback for running on a host
+try:
+    from time import ticks_ms, ticks_diff, ticks_add
+except ImportError:
+    def ticks_ms():
+        return int(time.monotonic() * 1000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+    def ticks_add(a, b):
+        return a + b
 
 # === HELPER FUNCTIONS ===
 def haversine_distance(lat1, lon1, lat2, lon2):
@@ -24,4 +38,194 @@ def is_within_view(bearing, window_dir, fov):
     if lower < upper:
         return lower <= bearing <= upper
     else:
-        return bearing >= lower or bearing <= upper
\ No newline at end of file
+        return bearing >= lower or bearing <= upper
+
+def flat_bearing(east, north):
+    return (math.degrees(math.atan2(east, north)) + 360) % 360
+
+# === OBSERVER ===
+EARTH_RADIUS_KM = 6371
+# Past this widening the flat sector test rejects too little to be worth it
+SECTOR_MAX_MARGIN_DEG = 30
+
+class Observer:
+    # Everything that only depends on the user's position and window is
+    # computed once here and reused for every aircraft on every poll
+    def __init__(self, lat, lon, window_dir, fov, max_radius_km, margin_deg=0.5):
+        self.lat = lat
+        self.lon = lon
+        self.window_dir = window_dir
+        self.fov = fov
+        self.max_radius_km = max_radius_km
+        self.lat_rad = math.radians(lat)
+        self.sin_lat = math.sin(self.lat_rad)
+        self.cos_lat = math.cos(self.lat_rad)
+
+        # Exact view bounds, as used by is_within_view
+        half_fov = fov / 2
+        self.view_lower = (window_dir - half_fov) % 360
+        self.view_upper = (window_dir + half_fov) % 360
+
+        # Lat/lon box around the MAX_RADIUS_KM circle
+        ang = max_radius_km / EARTH_RADIUS_KM
+        self.box_dlat = math.degrees(ang)
+        if math.sin(ang) < self.cos_lat:
+            self.box_dlon = math.degrees(math.asin(math.sin(ang) / self.cos_lat))
+        else:
+            self.box_dlon = 180  # Circle reaches a pole, every longitude is in range
+        self.lat_min = lat - self.box_dlat
+        self.lat_max = lat + self.box_dlat
+
+        # Approximate sector, widened by the worst bearing error of the flat
+        # projection inside the radius plus margin_deg, so it doesn't reject
+        # a plane the exact bearing check would accept. The error grows with
+        # the radius and with latitude; where it gets large (or the circle
+        # reaches a pole) the sector test is skipped altogether
+        if self.box_dlon >= 180:
+            self.sector_margin = 180
+        else:
+            self.sector_margin = self.flat_bearing_error() * 1.25 + margin_deg
+        if self.sector_margin > SECTOR_MAX_MARGIN_DEG:
+            self.sector_width = 360
+        else:
+            self.sector_width = fov + 2 * self.sector_margin
+        lower = math.radians(window_dir - self.sector_width / 2)
+        upper = math.radians(window_dir + self.sector_width / 2)
+        self.lower_e, self.lower_n = math.sin(lower), math.cos(lower)
+        self.upper_e, self.upper_n = math.sin(upper), math.cos(upper)
+
+    def flat_bearing_error(self):
+        # Largest difference, in degrees, between the flat-projection angle
+        # in_sector works with and the exact bearing, sampled over the circle
+        worst = 0
+        for step in range(1, 5):
+            distance = self.max_radius_km * step / 4
+            for bearing in range(0, 360, 5):
+                lat, lon = self.destination(bearing, distance)
+                flat = math.degrees(math.atan2(self.wrap_dlon(lon) * self.cos_lat, lat - self.lat))
+                error = abs((flat - bearing + 180) % 360 - 180)
+                worst = max(worst, error)
+        return worst
+
+    def wrap_dlon(self, lon):
+        dlon = lon - self.lon
+        if dlon > 180:
+            dlon -= 360
+        elif dlon < -180:
+            dlon += 360
+        return dlon
+
+    def in_box(self, lat, dlon):
+        return self.lat_min <= lat <= self.lat_max and -self.box_dlon <= dlon <= self.box_dlon
+
+    def in_sector(self, lat, dlon):
+        # Trig-free wedge test on a local flat projection: the sign of the cross
+        # product with each sector edge tells which side of it the plane is on
+        if self.sector_width >= 360:
+            return True
+        east = dlon * self.cos_lat
+        north = lat - self.lat
+        after_lower = self.lower_n * east - self.lower_e * north >= 0
+        before_upper = self.upper_e * north - self.upper_n * east >= 0
+        if self.sector_width <= 180:
+            return after_lower and before_upper
+        return after_lower or before_upper
+
+    def distance(self, lat, lon):
+        dlat = math.radians(lat - self.lat)
+        dlon = math.radians(lon - self.lon)
+        a = math.sin(dlat / 2) ** 2 + self.cos_lat * math.cos(math.radians(lat)) * math.sin(dlon / 2) ** 2
+        return EARTH_RADIUS_KM * (2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
+
+    def bearing(self, lat, lon):
+        lat2 = math.radians(lat)
+        dlon = math.radians(lon) - math.radians(self.lon)
+        cos_lat2 = math.cos(lat2)
+        x = math.sin(dlon) * cos_lat2
+        y = self.cos_lat * math.sin(lat2) - self.sin_lat * cos_lat2 * math.cos(dlon)
+        return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+    def in_view(self, bearing):
+        if self.view_lower < self.view_upper:
+            return self.view_lower <= bearing <= self.view_upper
+        return bearing >= self.view_lower or bearing <= self.view_upper
+
+    def approach_eta(self, lat, dlon, velocity, track):
+        # Seconds until a plane outside the visible wedge (the radius and the
+        # view's edges) flies into it on its current track; None if it never
+        # does or is already inside. Straight-line motion on a flat local
+        # projection, so it is a close estimate rather than exact
+        if velocity is None or track is None or velocity <= 0:
+            return None
+        km_per_deg = EARTH_RADIUS_KM * math.pi / 180
+        east = dlon * self.cos_lat * km_per_deg
+        north = (lat - self.lat) * km_per_deg
+        rad = math.radians(track)
+        ve = math.sin(rad) * velocity / 1000
+        vn = math.cos(rad) * velocity / 1000
+        radius = self.max_radius_km
+        c = east * east + north * north - radius * radius
+        if c <= 0 and self.in_view(flat_bearing(east, north)):
+            return None
+        # Starting outside, the first crossing of the wedge's boundary is
+        # where the plane enters it
+        best = None
+        # The arc: |p + v t| = radius, entered where the bearing is in view
+        a = ve * ve + vn * vn
+        b = east * ve + north * vn
+        disc = b * b - a * c
+        if disc >= 0:
+            root = math.sqrt(disc)
+            for t in ((-b - root) / a, (-b + root) / a):
+                if t > 0 and (best is None or t < best):
+                    if self.in_view(flat_bearing(east + ve * t, north + vn * t)):
+                        best = t
+        # The two edges: rays from the observer out to the radius
+        if self.fov < 360:
+            for edge in (self.view_lower, self.view_upper):
+                ue = math.sin(math.radians(edge))
+                un = math.cos(math.radians(edge))
+                across = ue * vn - un * ve
+                if across == 0:
+                    continue
+                t = -(ue * north - un * east) / across
+                if t > 0 and (best is None or t < best):
+                    if 0 <= (east + ve * t) * ue + (north + vn * t) * un <= radius:
+                        best = t
+        return best
+
+    def destination(self, bearing, distance_km):
+        # Point reached from the observer along a great circle
+        ang = distance_km / EARTH_RADIUS_KM
+        theta = math.radians(bearing)
+        sin_ang, cos_ang = math.sin(ang), math.cos(ang)
+        lat2 = math.asin(self.sin_lat * cos_ang + self.cos_lat * sin_ang * math.cos(theta))
+        lon2 = math.radians(self.lon) + math.atan2(
+            math.sin(theta) * sin_ang * self.cos_lat, cos_ang - self.sin_lat * math.sin(lat2))
+        return math.degrees(lat2), math.degrees(lon2)
+
+    def query_box(self, margin_deg=0.01):
+        # Tightest lat/lon rectangle around the visible wedge: the observer,
+        # both arc ends, and any compass extreme of the circle inside the view
+        if self.fov >= 360:
+            bearings = (0, 90, 180, 270)
+            points = []
+        else:
+            bearings = [self.window_dir - self.fov / 2, self.window_dir + self.fov / 2]
+            for cardinal in (0, 90, 180, 270):
+                if self.in_view(cardinal):
+                    bearings.append(cardinal)
+            points = [(self.lat, self.lon)]
+        for bearing in bearings:
+            points.append(self.destination(bearing, self.max_radius_km))
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+        lamin, lamax = min(lats), max(lats)
+        lomin, lomax = min(lons), max(lons)
+        # The widest longitude of the circle is not exactly due east/west
+        if self.in_view(90) or self.fov >= 360:
+            lomax = max(lomax, self.lon + self.box_dlon)
+        if self.in_view(270) or self.fov >= 360:
+            lomin = min(lomin, self.lon - self.box_dlon)
+        return (max(lamin - margin_deg, -90), max(lomin - margin_deg, -180),
+                min(lamax + margin_deg, 90), min(lomax + margin_deg, 180))
@@ -0,0 +1,145 @@
+import gc
+import io
+import json
+import math
+import sys
+import flight_fetcher
+from config import USER_LAT, USER_LON, MAX_RADIUS_KM, MAX_ALT_M
+from flight_fetcher import get_visible_planes, observer
+from state_stream import StateStreamParser, read_stream
+
+# Heap used per poll by the old dict planes against the pooled Aircraft
+# records, over the same synthetic responses. Runs on the board from the
+# REPL, or on a host with main/ on the path:
+#   PYTHONPATH=main python tests/aircraft_heap_test.py
+STATES = 300
+POLLS = 12
+# The first polls fill the record pool and aren't counted
+WARMUP = 3
+TOP_K = 3
+
+MICROPYTHON = sys.implementation.name == "micropython"
+if not MICROPYTHON:
+    import tracemalloc
+
+def make_body(poll):
+    # Aircraft spread over a 2 degree square around the user, moving a little
+    # every poll, in the same layout as /api/states/all
+    states = []
+    for i in range(STATES):
+        a = i * 2.399963 + poll * 0.01
+        r = ((i * 7919) % 1000) / 1000
+        states.append([
+            "a{:05x}".format(i), "TST{:<5}".format(i), "United States", 1700000000 + poll, 1700000000 + poll,
+            USER_LON + r * math.cos(a), USER_LAT + r * math.sin(a), (i * 137) % 12000 * 1.0, False,
+            120.0 + i % 100, (i * 37) % 360 * 1.0, 0.0, None, 1000.0, "1200", False, 0,
+        ])
+    return json.dumps({"time": 1700000000 + poll, "states": states}).encode()
+
+class Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.raw = io.BytesIO(body)
+
+    def close(self):
+        pass
+
+class PayloadClient:
+    # Hands the fetcher a canned response instead of going to OpenSky
+    def __init__(self):
+        self.body = b""
+
+    def send(self, path, deadline=None):
+        pass
+
+    def readable(self):
+        return True
+
+    def receive(self):
+        return Response(self.body)
+
+def dict_poll(body):
+    # The fetcher as it was: every state decoded to a list, every visible
+    # plane a new dict, the whole list sorted
+    planes = []
+
+    def keep(state):
+        lon, lat, alt = state[5], state[6], state[7]
+        if lat is None or lon is None or alt is None or alt > MAX_ALT_M:
+            return
+        dlon = observer.wrap_dlon(lon)
+        if not observer.in_box(lat, dlon) or not observer.in_sector(lat, dlon):
+            return
+        distance = observer.distance(lat, lon)
+        if distance > MAX_RADIUS_KM:
+            return
+        bearing = observer.bearing(lat, lon)
+        if not observer.in_view(bearing):
+            return
+        planes.append({
+            "callsign": state[1],
+            "icao24": state[0],
+            "origin": state[2],
+            "lat": lat,
+            "lon": lon,
+            "alt": int(alt),
+            "distance_km": round(distance, 1),
+            "bearing": int(bearing),
+            "velocity": state[9],
+            "track": state[10],
+            "pos_time": state[3],
+            "age": 0
+        })
+
+    read_stream(io.BytesIO(body), StateStreamParser(keep), flight_fetcher.STREAM_CHUNK_SIZE)
+    planes.sort(key=lambda item: item.get("distance_km", float('inf')))
+    return planes
+
+def record_poll(body, top_k):
+    flight_fetcher.client.body = body
+    return get_visible_planes(top_k=top_k)
+
+def measure(poll, top_k=None):
+    # Bytes allocated during each poll and still held after it, averaged
+    # over the polls after the warm-up
+    allocated = 0
+    retained = 0
+    result = None
+    for n in range(POLLS):
+        body = make_body(n)
+        result = None
+        gc.collect()
+        if MICROPYTHON:
+            gc.disable()
+            start = gc.mem_alloc()
+            result = poll(body, top_k)
+            used = gc.mem_alloc() - start
+            gc.enable()
+            gc.collect()
+            kept = gc.mem_alloc() - start
+        else:
+            tracemalloc.start()
+            result = poll(body, top_k)
+            kept, used = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        if n >= WARMUP:
+            allocated += used
+            retained += kept
+    count = POLLS - WARMUP
+    return allocated // count, retained // count, len(result)
+
+if __name__ == '__main__':
+    flight_fetcher.client = PayloadClient()
+    # The streaming path the board takes, also on a host with numpy
+    flight_fetcher.USE_BATCH = False
+    rows = [
+        ("dicts", measure(lambda body, top_k: dict_poll(body))),
+        ("records", measure(record_poll)),
+        ("records top {}".format(TOP_K), measure(record_poll, TOP_K)),
+    ]
+    print("{} states per poll, {} polls, {}".format(STATES, POLLS - WARMUP, "gc.mem_alloc" if MICROPYTHON else "tracemalloc (peak)"))
+    for name, (allocated, retained, planes) in rows:
+        print("{:<14} {:>7} bytes per poll | {:>6} retained | {} planes".format(name, allocated, retained, planes))
+    print("Aircraft records allocated:", flight_fetcher.pool.allocated)
@@ -0,0 +1,269 @@
+import math
+import os
+import pickle
+import random
+import sys
+import time
+
+# Frame-equality checks for the display driver and render path, run on a host
+# against the emulated panel in tests/host (it sets up its own import path):
+#   python tests/display_frames_test.py
+#   python tests/display_frames_test.py --framebuf
+# --framebuf runs the libraries' framebuf paths against tests/host's model
+# of it. Frames can also be saved in one checkout and compared in another,
+# to show a change leaves the picture alone:
+#   python tests/display_frames_test.py --save /tmp/before.pkl
+#   python tests/display_frames_test.py --compare /tmp/before.pkl
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = os.path.join(ROOT, "tests", "host")
+sys.path[:0] = [HOST, os.path.join(ROOT, "main"), os.path.join(ROOT, "libraries"), os.path.join(ROOT, "fonts")]
+
+if not hasattr(time, "sleep_ms"):
+    time.sleep_ms = lambda ms: None
+
+import framebuf_model
+
+WIDTH = 480
+HEIGHT = 320
+PRIMITIVE_SEEDS = 8
+PRIMITIVE_OPS = 200
+
+# Modules that hold the panel or renderer state, imported afresh per run
+DISPLAY_MODULES = ("machine", "ST7796", "Band_Renderer", "Indexed_Frame", "Sprite_Cache",
+                   "Numeric_Readout", "display_controller")
+
+def fresh(use_framebuf):
+    for name in DISPLAY_MODULES + ("framebuf",):
+        sys.modules.pop(name, None)
+    if use_framebuf:
+        sys.modules["framebuf"] = framebuf_model
+
+def fresh_lcd(use_framebuf):
+    fresh(use_framebuf)
+    import machine
+    from ST7796 import LCD_35_ST7796
+    spi = machine.SPI()
+    lcd = LCD_35_ST7796(spi, 15, machine.RS_PIN, 27)
+    lcd.LCD_Set_Rotate(1)
+    return spi, lcd
+
+def fresh_display(use_framebuf):
+    fresh(use_framebuf)
+    import display_controller
+    return display_controller
+
+class Immediate:
+    # Stands in for the renderer so every op goes straight to the panel
+    def Begin(self):
+        pass
+
+    def End(self):
+        pass
+
+def describe(a, b):
+    xs = []
+    ys = []
+    for i in range(0, len(a), 2):
+        if a[i:i + 2] != b[i:i + 2]:
+            xs.append(i // 2 % WIDTH)
+            ys.append(i // 2 // WIDTH)
+    return "{} px differ in x {}..{} y {}..{}".format(len(xs), min(xs), max(xs), min(ys), max(ys))
+
+# === PRIMITIVES ===
+# Random drawing, batched into each renderer and drawn immediately, must give
+# the same frame. Colours come from one palette so the indexed frame can hold
+# them exactly.
+PALETTE = [0x0820, 0x2104, 0x4A49, 0x8C71, 0xA254, 0xF81F, 0x07FF, 0x07E0,
+           0x3186, 0x0400, 0xFD00, 0xFA00, 0x528A, 0x18E3, 0xFFFF]
+
+def draw_primitives(seed, use_framebuf, renderer):
+    from Font_6x12_EN import Font_6x12_EN
+    spi, lcd = fresh_lcd(use_framebuf)
+    frame = None
+    if renderer == "bands":
+        from Band_Renderer import Band_Renderer
+        frame = Band_Renderer(lcd)
+    elif renderer == "indexed":
+        from Indexed_Frame import Indexed_Frame
+        frame = Indexed_Frame(lcd, PALETTE)
+    rnd = random.Random(seed)
+    lcd.LCD_Clear(PALETTE[0])
+    if frame is not None:
+        frame.Begin()
+    for k in range(PRIMITIVE_OPS):
+        op = rnd.random()
+        color = rnd.choice(PALETTE)
+        x = rnd.randrange(20, 440)
+        y = rnd.randrange(20, 290)
+        if op < 0.2:
+            lcd.Fill_Rect(x, y, rnd.randrange(1, 40), rnd.randrange(1, 30), color)
+        elif op < 0.3:
+            lcd.Draw_Hline(x, y, rnd.randrange(0, 30), color)
+        elif op < 0.4:
+            lcd.Draw_Vline(x, y, rnd.randrange(0, 20), color)
+        elif op < 0.45:
+            lcd.Draw_Point(x, y, color)
+        elif op < 0.55:
+            lcd.Draw_Circle(x, y, rnd.randrange(1, 19), color)
+        elif op < 0.6:
+            lcd.Fill_Circle(x, y, rnd.randrange(1, 12), color)
+        elif op < 0.65:
+            lcd.Fill_Triangle(x, y, x + 10, y + 5, x - 4, y + 12, color)
+        elif op < 0.7:
+            lcd.Draw_line(x, y, rnd.randrange(20, 440), rnd.randrange(20, 290), color)
+        elif op < 0.75:
+            region = b"".join(rnd.choice(PALETTE).to_bytes(2, "big") for i in range(15))
+            lcd.Fill_Region(x, y, bytearray(region), 5, 3)
+        elif op < 0.9:
+            back = rnd.choice(PALETTE) if op > 0.85 else None
+            lcd.Show_String(x, y, "Q%d!" % k, Font_6x12_EN, color, back)
+        elif op < 0.92 and frame is not None:
+            # Frame boundary in the middle of the drawing
+            frame.End()
+            frame.Begin()
+        elif op < 0.93:
+            lcd.Read_Point(x, y)
+    if frame is not None:
+        frame.End()
+    return spi.frame(WIDTH, HEIGHT)
+
+def check_primitives(use_framebuf):
+    failures = 0
+    for seed in range(PRIMITIVE_SEEDS):
+        expected = draw_primitives(seed, use_framebuf, None)
+        for renderer in ("bands", "indexed"):
+            got = draw_primitives(seed, use_framebuf, renderer)
+            if got != expected:
+                failures += 1
+                print("primitives seed {} {}: {}".format(seed, renderer, describe(got, expected)))
+    print("primitives: {} seeds, {} renderer mismatches".format(PRIMITIVE_SEEDS, failures))
+    return failures
+
+# === DISPLAY SCENARIO ===
+# Polls and dead-reckoning frames through display_controller. The planes keep
+# their range order, so a full redraw puts them in the slots the incremental
+# updates kept them in and the two frames can be compared whole.
+SCENARIO_PLANES = 6
+
+def scenario_planes():
+    from aircraft import Aircraft
+    planes = []
+    for i in range(SCENARIO_PLANES):
+        plane = Aircraft()
+        plane.icao24 = "a%05d" % i
+        plane.callsign = "UAL%d" % (100 + i)
+        plane.origin = "United States" if i % 2 else None
+        plane.lat = 47.5 + 0.05 * i
+        plane.lon = -122.2 + 0.12 * (i + 1)
+        plane.alt = 1200 + 1500 * i
+        plane.velocity = 200.0
+        plane.track = 90.0
+        plane.pos_time = 1700000000
+        planes.append(plane)
+    return planes
+
+def place(planes):
+    # Range and bearing from a user at 47.45, -122.30 on a flat projection
+    for plane in planes:
+        north = (plane.lat - 47.45) * 111.2
+        east = (plane.lon + 122.30) * 111.2 * math.cos(math.radians(plane.lat))
+        plane.distance_km = round(math.sqrt(north * north + east * east), 1)
+        plane.bearing = int(math.degrees(math.atan2(east, north)) % 360)
+
+def copy_plane(plane):
+    from aircraft import Aircraft
+    copy = Aircraft()
+    for name in Aircraft.__slots__:
+        setattr(copy, name, getattr(plane, name))
+    return copy
+
+def scenario_steps():
+    # (name, kind, planes shown, total visible, stale), each step with its
+    # own copies of the planes as they were then
+    planes = scenario_planes()
+    steps = []
+    for poll in range(6):
+        for i, plane in enumerate(planes):
+            plane.lat += 0.008 * math.cos(i)
+            plane.lon += 0.01
+            plane.alt += (150, -120, 0, 40, -60, 90)[i]
+            plane.pos_time += 10
+        place(planes)
+        nearest = sorted(planes, key=lambda plane: plane.distance_km)[:3]
+        total = (3, 5, 120, 3, 4, 6)[poll]
+        steps.append(("poll%d" % poll, "show", [copy_plane(plane) for plane in nearest], total, poll == 3))
+        # Dead reckoning moves them along between polls
+        for plane in planes:
+            plane.lat += 0.003
+            plane.lon += 0.004
+        place(planes)
+        steps.append(("motion%d" % poll, "motion", [copy_plane(plane) for plane in nearest], total, poll == 3))
+        if poll == 3:
+            steps.append(("none", "show", [], 0, False))
+    # Sub-zero altitude
+    planes[0].alt = -30
+    nearest = sorted(planes, key=lambda plane: plane.distance_km)[:3]
+    steps.append(("below", "show", [copy_plane(plane) for plane in nearest], 6, False))
+    return steps
+
+def run_scenario(use_framebuf, mode):
+    # mode: "incremental" as on the board, "immediate" with batching off, or
+    # "full" with a from-scratch redraw at every step
+    from track_store import TrackStore
+    dc = fresh_display(use_framebuf)
+    if mode == "immediate":
+        dc.renderer = Immediate()
+    tracks = TrackStore()
+    frames = []
+    for name, kind, shown, total, stale in scenario_steps():
+        if kind == "show":
+            for plane in shown:
+                tracks.append(plane.icao24, plane.pos_time, plane.lat, plane.lon, plane.alt)
+            tracks.end_poll()
+        if mode == "full":
+            dc.force_refresh()
+            dc.show_planes(shown, stale, total, tracks)
+        elif kind == "show":
+            dc.show_planes(shown, stale, total, tracks)
+        else:
+            dc.update_motion(shown)
+        frames.append((name, dc.spi.frame(WIDTH, HEIGHT)))
+    return frames
+
+def check_scenario(use_framebuf):
+    reference = run_scenario(use_framebuf, "incremental")
+    failures = 0
+    for mode in ("immediate", "full"):
+        for (name, expected), (_, got) in zip(reference, run_scenario(use_framebuf, mode)):
+            if got != expected:
+                failures += 1
+                print("scenario {} {}: {}".format(name, mode, describe(got, expected)))
+    print("scenario: {} frames, {} mismatches against immediate and full redraws".format(len(reference), failures))
+    return failures, reference
+
+def compare_saved(path, frames):
+    with open(path, "rb") as f:
+        saved = pickle.load(f)
+    failures = 0
+    for (name, expected), (_, got) in zip(saved, frames):
+        if got != expected:
+            failures += 1
+            print("saved {}: {}".format(name, describe(got, expected)))
+    if len(saved) != len(frames):
+        failures += 1
+        print("saved run has {} frames, this one {}".format(len(saved), len(frames)))
+    print("saved frames: {} mismatches".format(failures))
+    return failures
+
+if __name__ == '__main__':
+    use_framebuf = "--framebuf" in sys.argv
+    failures = check_primitives(use_framebuf)
+    scenario_failures, frames = check_scenario(use_framebuf)
+    failures += scenario_failures
+    if "--save" in sys.argv:
+        with open(sys.argv[sys.argv.index("--save") + 1], "wb") as f:
+            pickle.dump(frames, f)
+    if "--compare" in sys.argv:
+        failures += compare_saved(sys.argv[sys.argv.index("--compare") + 1], frames)
+    print("FAILED" if failures else "ok")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,71 @@
+# Host model of the parts of MicroPython's framebuf the display libraries
+# use: RGB565 (native little endian), GS4_HMSB and MONO_HLSB buffers, fills
+# and palette blits. It is not on the import path as "framebuf"; the display
+# test installs it explicitly to exercise the libraries' framebuf paths.
+
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+
+class FrameBuffer:
+    def __init__(self, buf, w, h, fmt):
+        if isinstance(buf, bytes):
+            raise TypeError("object with buffer protocol required")
+        self.buf = buf
+        self.w = w
+        self.h = h
+        self.fmt = fmt
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def _get(self, x, y):
+        if self.fmt == RGB565:
+            pos = 2 * (y * self.w + x)
+            return self.buf[pos] | self.buf[pos + 1] << 8
+        if self.fmt == GS4_HMSB:
+            b = self.buf[(y * self.w + x) // 2]
+            return b & 0xF if x & 1 else b >> 4
+        return (self.buf[y * ((self.w + 7) // 8) + x // 8] >> (7 - (x & 7))) & 1
+
+    def _set(self, x, y, c):
+        if self.fmt == RGB565:
+            pos = 2 * (y * self.w + x)
+            self.buf[pos] = c & 0xFF
+            self.buf[pos + 1] = c >> 8
+        elif self.fmt == GS4_HMSB:
+            pos = (y * self.w + x) // 2
+            if x & 1:
+                self.buf[pos] = (self.buf[pos] & 0xF0) | c
+            else:
+                self.buf[pos] = (self.buf[pos] & 0x0F) | (c << 4)
+        else:
+            raise NotImplementedError("MONO_HLSB is only read")
+
+    def fill_rect(self, x, y, w, h, c):
+        x1 = max(x, 0)
+        x2 = min(x + w, self.w)
+        if x1 >= x2:
+            return
+        for row in range(max(y, 0), min(y + h, self.h)):
+            if self.fmt == RGB565:
+                pos = 2 * (row * self.w)
+                self.buf[pos + 2 * x1:pos + 2 * x2] = bytes((c & 0xFF, c >> 8)) * (x2 - x1)
+            else:
+                for col in range(x1, x2):
+                    self._set(col, row, c)
+
+    def fill(self, c):
+        self.fill_rect(0, 0, self.w, self.h, c)
+
+    def blit(self, src, x, y, key=-1, palette=None):
+        for row in range(max(0, -y), min(src.h, self.h - y)):
+            for col in range(max(0, -x), min(src.w, self.w - x)):
+                c = src._get(col, row)
+                # Like MicroPython, the key is compared after the palette
+                if palette is not None:
+                    c = palette._get(c, 0)
+                if c != key:
+                    self._set(x + col, y + row, c)
@@ -0,0 +1,131 @@
+# Host stand-in for MicroPython's machine module, used by the display tests.
+# The SPI bus is wired to a model of the ST7796's frame memory: it follows
+# the column/row address commands and memory writes the driver sends and
+# answers memory reads, so the tests can compare what ends up on the panel.
+
+# Data/command pin of the panel, as wired in main/display_controller.py
+RS_PIN = 2
+
+# ST7796 commands the model understands
+CASET = 0x2A
+RASET = 0x2B
+RAMWR = 0x2C
+RAMRD = 0x2E
+
+# Frame memory is kept at the panel's largest dimension in both directions,
+# so either rotation fits
+SIDE = 480
+
+pins = {}
+
+class Pin:
+    OUT = 1
+    IN = 0
+
+    def __init__(self, n, mode=None, value=0):
+        self.n = n
+        self.v = value
+        pins[n] = self
+
+    def __call__(self, v=None):
+        if v is None:
+            return self.v
+        self.v = v
+
+    def value(self, v=None):
+        return self(v)
+
+class SPI:
+    def __init__(self, *args, **kwargs):
+        self.mem = bytearray(SIDE * SIDE * 2)
+        self.cmd = None
+        self.args = bytearray()
+        self.x1 = self.x2 = self.y1 = self.y2 = 0
+        self.cx = self.cy = 0
+        self.odd = b""
+        self.dummy = False
+        # Traffic counters
+        self.writes = 0
+        self.nbytes = 0
+        self.reads = 0
+
+    def init(self, **kwargs):
+        pass
+
+    def _data(self):
+        pin = pins.get(RS_PIN)
+        return pin is not None and pin.v
+
+    def write(self, buf):
+        self.writes += 1
+        self.nbytes += len(buf)
+        buf = bytes(buf)
+        if not self._data():
+            self.cmd = buf[0]
+            self.args = bytearray()
+            self.odd = b""
+            if self.cmd in (RAMWR, RAMRD):
+                self.cx, self.cy = self.x1, self.y1
+                # Memory reads start with a dummy byte
+                self.dummy = self.cmd == RAMRD
+            return
+        if self.cmd == RAMWR:
+            self._write_pixels(self.odd + buf)
+            return
+        self.args += buf
+        if len(self.args) == 4:
+            start = self.args[0] << 8 | self.args[1]
+            end = self.args[2] << 8 | self.args[3]
+            if self.cmd == CASET:
+                self.x1, self.x2 = start, end
+            elif self.cmd == RASET:
+                self.y1, self.y2 = start, end
+
+    def _advance(self, n):
+        # Move the memory cursor n pixels through the address window
+        self.cx += n
+        while self.cx > self.x2:
+            self.cx -= self.x2 - self.x1 + 1
+            self.cy += 1
+            if self.cy > self.y2:
+                self.cy = self.y1
+
+    def _write_pixels(self, buf):
+        if len(buf) & 1:
+            self.odd = buf[-1:]
+            buf = buf[:-1]
+        else:
+            self.odd = b""
+        i = 0
+        while i < len(buf):
+            # Up to the end of the window's current row
+            n = min(self.x2 - self.cx + 1, (len(buf) - i) // 2)
+            if self.cy < SIDE and self.cx < SIDE:
+                pos = (self.cy * SIDE + self.cx) * 2
+                m = min(n, SIDE - self.cx) * 2
+                self.mem[pos:pos + m] = buf[i:i + m]
+            i += 2 * n
+            self._advance(n)
+
+    def readinto(self, buf):
+        self.reads += 1
+        i = 0
+        if self.dummy and len(buf):
+            buf[0] = 0
+            self.dummy = False
+            i = 1
+        while i + 1 < len(buf):
+            pos = (self.cy * SIDE + self.cx) * 2
+            buf[i] = self.mem[pos]
+            buf[i + 1] = self.mem[pos + 1]
+            i += 2
+            self._advance(1)
+
+    def read(self, n):
+        buf = bytearray(n)
+        self.readinto(buf)
+        return bytes(buf)
+
+    def frame(self, w, h):
+        # The top-left w x h pixels, RGB565 big endian
+        return b"".join(self.mem[y * SIDE * 2:(y * SIDE + w) * 2] for y in range(h))
@@ -0,0 +1,2 @@
+# Host stand-in for MicroPython's ustruct
+from struct import *
@@ -0,0 +1,82 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from http_client import HttpClient
+from state_stream import StateStreamParser, read_stream
+
+# Local stand-in for the OpenSky endpoint, run on the host with main/ on the path:
+#   PYTHONPATH=main python tests/http_client_test.py
+PAYLOAD = json.dumps({"time": 1700000000, "states": [
+    ["abc123", "TEST1   ", "United States", 0, 0, -122.3, 47.5, 1000.0, False, 120.0, 90.0, 0.0, None, 1000.0, "1200", False, 0],
+    ["def456", "TEST2   ", "Canada", 0, 0, -122.1, 47.6, 3000.0, False, 200.0, 45.0, 0.0, None, 3000.0, "1200", False, 0],
+]}).encode()
+
+connections = []
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        connections.append(self.client_address)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if self.path.startswith("/chunked"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(PAYLOAD), 100):
+                part = PAYLOAD[i:i + 100]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            if self.path.startswith("/close"):
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            elif self.path.startswith("/drop"):
+                # Looks kept-alive to the client but the server hangs up
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = HTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def fetch_states(client, path):
+    states = []
+    res = client.get(path)
+    assert res.status_code == 200
+    read_stream(res.raw, StateStreamParser(states.append), 64)
+    res.close()
+    return states
+
+def check_keep_alive(client):
+    for path in ("/api/states/all", "/chunked", "/api/states/all"):
+        assert len(fetch_states(client, path)) == 2
+    assert client.connects == 1, client.connects
+    print("keep-alive: 3 requests over", client.connects, "connection")
+
+def check_reconnect(client):
+    assert len(fetch_states(client, "/close")) == 2
+    assert len(fetch_states(client, "/api/states/all")) == 2
+    assert client.connects == 2, client.connects
+    # The server drops the idle connection, the next get must recover
+    assert len(fetch_states(client, "/drop")) == 2
+    assert len(fetch_states(client, "/api/states/all")) == 2
+    assert client.connects == 3, client.connects
+    print("reconnect: recovered with", client.connects, "connections")
+
+if __name__ == '__main__':
+    server = start_server()
+    client = HttpClient("127.0.0.1", server.server_address[1], use_ssl=False, connect_timeout=2, read_timeout=2)
+    check_keep_alive(client)
+    check_reconnect(client)
+    client.close()
+    server.shutdown()